@@ -0,0 +1,43 @@
+"""JWT authentication resolving users through the cache.
+
+`JWTAuthentication` loads the user row on every request. Here the user is
+kept in the cache for `AUTH_USER_CACHE["TIMEOUT"]` seconds and the entry
+is deleted by `User` signals (see `api.signals`), so role or activity
+changes take effect at once. With a per-process cache (locmem) other
+processes only see a change after the timeout.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+
+def get_cache():
+    return caches[settings.AUTH_USER_CACHE["CACHE_ALIAS"]]
+
+
+def user_cache_key(user_id) -> str:
+    return f"auth:user:{user_id}"
+
+
+def forget_user(user_id) -> None:
+    """Drops the cached user, next request will load it from the DB."""
+    get_cache().delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        cache = get_cache()
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # Неактивный или удалённый пользователь не кэшируется:
+            # исключение поднимет родительский метод
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE["TIMEOUT"])
+        return user
@@ -0,0 +1,108 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from reviews import counters, versions
+from reviews.models import Review, Title, User
+
+from .serializers import ReviewBulkSerializer
+
+
+def chunks(items, size):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ReviewBulkIngestion:
+    """Validates and inserts a batch of partner reviews.
+
+    Records are validated in batches; titles, authors and already existing
+    reviews of a batch are resolved by one query each. All valid records are
+    inserted with `bulk_create` in a single transaction together with the
+    rating counters update. Invalid records are skipped and reported by
+    their index in the payload.
+    """
+
+    duplicate_error = (
+        "Пользователь может оставить только один отзыв на произведение"
+    )
+
+    def __init__(self, records: list):
+        self.records = records
+        self.batch_size = settings.REVIEW_BULK["BATCH_SIZE"]
+        self.errors = []
+        self.reviews = []
+        self.seen = set()
+
+    def add_error(self, index, errors):
+        self.errors.append({"index": index, "errors": errors})
+
+    def validate_batch(self, batch):
+        valid = []
+        for index, record in batch:
+            serializer = ReviewBulkSerializer(data=record)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                self.add_error(index, serializer.errors)
+        if not valid:
+            return
+
+        title_ids = {data["title_id"] for _, data in valid}
+        usernames = {data["author"] for _, data in valid}
+        titles = set(
+            Title.objects.filter(pk__in=title_ids).values_list("pk", flat=True)
+        )
+        authors = dict(
+            User.objects.filter(username__in=usernames).values_list(
+                "username", "pk"
+            )
+        )
+        self.seen.update(
+            Review.objects.filter(
+                title_id__in=titles, author_id__in=list(authors.values())
+            ).values_list("author_id", "title_id")
+        )
+
+        for index, data in valid:
+            if data["title_id"] not in titles:
+                self.add_error(
+                    index, {"title_id": ["Произведение не найдено"]}
+                )
+                continue
+            if data["author"] not in authors:
+                self.add_error(index, {"author": ["Пользователь не найден"]})
+                continue
+            key = (authors[data["author"]], data["title_id"])
+            if key in self.seen:
+                self.add_error(
+                    index, {"non_field_errors": [self.duplicate_error]}
+                )
+                continue
+            self.seen.add(key)
+            data["author_id"] = authors[data.pop("author")]
+            self.reviews.append(Review(**data))
+
+    def save(self) -> int:
+        for batch in chunks(enumerate(self.records), self.batch_size):
+            self.validate_batch(batch)
+        self.errors.sort(key=lambda error: error["index"])
+        if not self.reviews:
+            return 0
+
+        scores = {}
+        for review in self.reviews:
+            scores.setdefault(review.title_id, []).append(review.score)
+        with transaction.atomic():
+            Review.objects.bulk_create(
+                self.reviews, batch_size=self.batch_size
+            )
+            for title_id, title_scores in scores.items():
+                counters.reviews_added(title_id, title_scores)
+            # bulk_create не отправляет сигналы post_save
+            transaction.on_commit(lambda: versions.bump_version(Review))
+        return len(self.reviews)
@@ -0,0 +1,114 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from reviews.models import Title
+from reviews.versions import get_cache, get_versions, is_shared
+
+
+def normalized_query(request) -> str:
+    """Returns query string with parameters in a stable order."""
+    return urlencode(
+        sorted(
+            (param, value)
+            for param, values in request.query_params.lists()
+            for value in values
+        )
+    )
+
+
+class CachedListMixin:
+    """Caches list responses for anonymous users.
+
+    The cache key contains the normalized query string and the data versions
+    of `cache_dependencies` models, so any write to one of them makes the
+    stored responses unreachable. Responses are not cached with a
+    per-process backend (locmem): it misses the version bumps made by other
+    server workers and by management commands, e.g. `import_csv`.
+    """
+
+    cache_dependencies = ()
+
+    def get_list_cache_key(self, request):
+        query = normalized_query(request)
+        versions = ".".join(map(str, get_versions(*self.cache_dependencies)))
+        digest = hashlib.md5(
+            f"{request.get_host()}{request.path}?{query}".encode()
+        ).hexdigest()
+        return f"response:{self.basename}:{versions}:{digest}"
+
+    def list(self, request, *args, **kwargs):
+        if not request.user.is_anonymous or not is_shared():
+            return super().list(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = self.get_list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE["TIMEOUT"])
+        return response
+
+
+class TitleETagMixin:
+    """Answers conditional GET requests of `etag_actions` by title version.
+
+    The strong ETag is built from `Title.version`, which is incremented on
+    every change of the title, its genres or reviews, so the validator costs
+    a single primary key lookup and a matching `If-None-Match` is answered
+    with `304 Not Modified` without serialization.
+    """
+
+    etag_actions = ()
+    title_url_kwarg = "title_id"
+
+    def get_etag(self, request):
+        title_id = str(self.kwargs.get(self.title_url_kwarg, ""))
+        if not title_id.isdigit():
+            return None
+        version = (
+            Title.objects.filter(pk=title_id)
+            .values_list("version", flat=True)
+            .first()
+        )
+        if version is None:
+            return None
+        variant = hashlib.md5(
+            f"{self.action}:{request.accepted_renderer.format}:"
+            f"{normalized_query(request)}".encode()
+        ).hexdigest()[:16]
+        return quote_etag(f"{title_id}.{version}.{variant}")
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        handler = super().list
+        if self.action not in self.etag_actions:
+            return handler(request, *args, **kwargs)
+        return self.conditional_response(handler, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        handler = super().retrieve
+        if self.action not in self.etag_actions:
+            return handler(request, *args, **kwargs)
+        return self.conditional_response(handler, request, *args, **kwargs)
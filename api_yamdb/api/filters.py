@@ -1,5 +1,9 @@
+from django.conf import settings
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
+from reviews.membership import filter_by_ids, title_index
 from reviews.models import Title
+from reviews.search import search_titles
 
 
 class CharFilterInFilter(filters.BaseInFilter, filters.CharFilter):
@@ -10,10 +14,56 @@ class CategoryGenreFilter(filters.FilterSet):
     category = CharFilterInFilter(
         field_name="category__slug", lookup_expr="in"
     )
-    genre = CharFilterInFilter(field_name="genre__slug", lookup_expr="in")
-    year = filters.NumberFilter(field_name="year", lookup_expr="contains")
+    genre = CharFilterInFilter(
+        field_name="genre__slug", lookup_expr="in", distinct=True
+    )
+    year = filters.NumberFilter(field_name="year")
+    year_min = filters.NumberFilter(field_name="year", lookup_expr="gte")
+    year_max = filters.NumberFilter(field_name="year", lookup_expr="lte")
+    decade = filters.NumberFilter(method="filter_decade")
     name = filters.Filter(field_name="name", lookup_expr="icontains")
 
     class Meta:
         model = Title
-        fields = ("category", "genre", "year", "name")
+        fields = (
+            "category",
+            "genre",
+            "year",
+            "year_min",
+            "year_max",
+            "decade",
+            "name",
+        )
+
+    membership_filters = ("category", "genre")
+
+    def filter_queryset(self, queryset):
+        data = self.form.cleaned_data
+        title_ids = None
+        if settings.TITLE_MEMBERSHIP_INDEX["ENABLED"]:
+            title_ids = title_index.title_ids(
+                genres=data.get("genre"), categories=data.get("category")
+            )
+        if title_ids is not None:
+            queryset = filter_by_ids(queryset, title_ids)
+
+        for name, value in data.items():
+            if title_ids is not None and name in self.membership_filters:
+                continue
+            queryset = self.filters[name].filter(queryset, value)
+        return queryset
+
+    def filter_decade(self, queryset, name, value):
+        # Диапазон вместо вычислений над годом, чтобы работал индекс
+        start = int(value) // 10 * 10
+        return queryset.filter(year__gte=start, year__lte=start + 9)
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Full-text search by title name and description, ranked by relevance"""
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        return search_titles(queryset, query)
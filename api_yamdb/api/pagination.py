@@ -0,0 +1,153 @@
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    LimitOffsetPagination,
+    _reverse_ordering,
+)
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination over a composite ordering.
+
+    DRF puts only the first ordering field into the cursor and skips the rows
+    sharing its value with OFFSET. Here the cursor holds the values of all
+    ordering fields, the last of which must be unique, and the next page is
+    selected by the row comparison `(pub_date, id) < (x, y)`: a deep page
+    costs the same as the first one. The `limit` parameter sets page size.
+    """
+
+    page_size_query_param = "limit"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, position = False, None
+        else:
+            reverse, position = self.cursor.reverse, self.cursor.position
+
+        ordering = (
+            _reverse_ordering(self.ordering) if reverse else self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(ordering))
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.next_position = self.previous_position = position
+        if self.page:
+            self.next_position = self.encode_position(self.page[-1])
+            self.previous_position = self.encode_position(self.page[0])
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        cursor = Cursor(offset=0, reverse=False, position=self.next_position)
+        return self.encode_cursor(cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        cursor = Cursor(
+            offset=0, reverse=True, position=self.previous_position
+        )
+        return self.encode_cursor(cursor)
+
+    def encode_position(self, instance):
+        values = []
+        for order in self.ordering:
+            name = order.lstrip("-")
+            if isinstance(instance, dict):
+                value = instance[name]
+            else:
+                value = getattr(instance, name)
+            values.append(str(value))
+        return json.dumps(values)
+
+    def get_position_filter(self, ordering):
+        """Condition selecting the rows that follow the cursor position"""
+        try:
+            raw_values = json.loads(self.cursor.position)
+            if not isinstance(raw_values, list) or len(raw_values) != len(
+                ordering
+            ):
+                raise ValueError
+            values = [
+                self.model._meta.get_field(order.lstrip("-")).to_python(raw)
+                for order, raw in zip(ordering, raw_values)
+            ]
+        except (FieldDoesNotExist, TypeError, ValidationError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # (a, b) > (x, y) раскрывается в a > x OR (a = x AND b > y)
+        condition = Q()
+        equal = {}
+        for order, value in zip(ordering, values):
+            name = order.lstrip("-")
+            lookup = "lt" if order.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+
+class LimitOffsetOrKeysetPagination(LimitOffsetPagination):
+    """Limit/offset pagination with an opt-in keyset (cursor) mode.
+
+    Old clients keep using `limit` and `offset`. A request with the `cursor`
+    parameter (an empty value requests the first page) is paginated by
+    `keyset_pagination_class`: the page is fetched by an indexed range
+    condition instead of skipping `offset` rows, and no `COUNT(*)` is run.
+    """
+
+    keyset_pagination_class = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_paginator = None
+        keyset_paginator = self.keyset_pagination_class()
+        if keyset_paginator.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset_paginator = keyset_paginator
+        return keyset_paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class TitleKeysetPagination(KeysetPagination):
+    ordering = "id"
+
+
+class PubDateKeysetPagination(KeysetPagination):
+    ordering = ("-pub_date", "-id")
+
+
+class TitlePagination(LimitOffsetOrKeysetPagination):
+    keyset_pagination_class = TitleKeysetPagination
+
+
+class PubDatePagination(LimitOffsetOrKeysetPagination):
+    keyset_pagination_class = PubDateKeysetPagination
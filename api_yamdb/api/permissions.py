@@ -1,4 +1,7 @@
 from rest_framework import permissions
+from users.models import User
+
+from .tokens import ROLE_CLAIM, SUPERUSER_CLAIM, role_claims
 
 
 class PermissionPerMethodMixin:
@@ -33,38 +36,47 @@ class IsOwner(permissions.BasePermission):
         return bool(
             request.user
             and request.user.is_authenticated
-            and obj.author
-            and obj.author == request.user
+            # Сравнение по id не загружает автора из БД
+            and obj.author_id == request.user.pk
         )
 
 
 class IsAdmin(permissions.BasePermission):
-    def has_permission(self, request, view):
+    @staticmethod
+    def check(request):
+        # Роль из токена позволяет не загружать пользователя
+        claims = role_claims(request)
+        if claims is not None:
+            return bool(
+                claims[ROLE_CLAIM] == User.ADMIN or claims[SUPERUSER_CLAIM]
+            )
         return bool(
             request.user
             and request.user.is_authenticated
             and request.user.is_admin
         )
 
+    def has_permission(self, request, view):
+        return self.check(request)
+
     def has_object_permission(self, request, view, obj):
-        return bool(
-            request.user
-            and request.user.is_authenticated
-            and request.user.is_admin
-        )
+        return self.check(request)
 
 
 class IsModerator(permissions.BasePermission):
-    def has_permission(self, request, view):
+    @staticmethod
+    def check(request):
+        claims = role_claims(request)
+        if claims is not None:
+            return claims[ROLE_CLAIM] == User.MODERATOR
         return bool(
             request.user
             and request.user.is_authenticated
             and request.user.is_moderator
         )
 
+    def has_permission(self, request, view):
+        return self.check(request)
+
     def has_object_permission(self, request, view, obj):
-        return bool(
-            request.user
-            and request.user.is_authenticated
-            and request.user.is_moderator
-        )
+        return self.check(request)
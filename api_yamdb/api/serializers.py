@@ -96,13 +96,32 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ("id", "text", "author", "score", "pub_date", "title")
+        fields = (
+            "id",
+            "text",
+            "author",
+            "score",
+            "pub_date",
+            "title",
+            "comments_count",
+        )
+        read_only_fields = ("comments_count",)
+
+
+class ReviewBulkSerializer(serializers.Serializer):
+    """Single record of the bulk review ingestion payload"""
+
+    title_id = serializers.IntegerField()
+    author = serializers.CharField(max_length=150)
+    text = serializers.CharField()
+    score = serializers.IntegerField(min_value=1, max_value=10)
+    pub_date = serializers.DateTimeField(required=False)
 
 
 class TitleSerializer(serializers.ModelSerializer):
     category = CategorySerializer(many=False, read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
-    rating = serializers.SerializerMethodField()
+    rating = serializers.ReadOnlyField()
 
     class Meta:
         model = Title
@@ -116,8 +135,12 @@ class TitleSerializer(serializers.ModelSerializer):
             "category",
         )
 
-    def get_rating(self, obj):
-        return obj.get_rating().get("rating", 0)
+
+class TitleTopSerializer(TitleSerializer):
+    weighted_rating = serializers.ReadOnlyField()
+
+    class Meta(TitleSerializer.Meta):
+        fields = TitleSerializer.Meta.fields + ("weighted_rating",)
 
 
 class TitleCreateSerializer(serializers.ModelSerializer):
@@ -151,3 +174,58 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ("id", "text", "author", "pub_date")
+
+
+class FlatListSerializer:
+    """Fast serializer of list pages.
+
+    Reads only the columns listed in `projection` (output field name to
+    model lookup, relations are joined by the database) with `values()`
+    and builds the output dicts directly, bypassing DRF field machinery.
+    The output must stay identical to `model_serializer_class`.
+    """
+
+    model_serializer_class = None
+    projection = {}
+    datetime_fields = ("pub_date",)
+
+    def __init__(self):
+        self.datetime_field = serializers.DateTimeField()
+
+    def project(self, queryset):
+        return queryset.values(*self.projection.values())
+
+    def serialize(self, rows) -> list[dict]:
+        to_datetime = self.datetime_field.to_representation
+        result = []
+        for row in rows:
+            item = {
+                field: row[lookup] for field, lookup in self.projection.items()
+            }
+            for field in self.datetime_fields:
+                item[field] = to_datetime(item[field])
+            result.append(item)
+        return result
+
+
+class ReviewFlatSerializer(FlatListSerializer):
+    model_serializer_class = ReviewSerializer
+    projection = {
+        "id": "id",
+        "text": "text",
+        "author": "author__username",
+        "score": "score",
+        "pub_date": "pub_date",
+        "title": "title__name",
+        "comments_count": "comments_count",
+    }
+
+
+class CommentFlatSerializer(FlatListSerializer):
+    model_serializer_class = CommentSerializer
+    projection = {
+        "id": "id",
+        "text": "text",
+        "author": "author__username",
+        "pub_date": "pub_date",
+    }
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from users.models import User
+
+from .authentication import forget_user
+from .tokens import forget_token_version, set_token_version
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def update_token_version(sender, instance, **kwargs):
+    # После фиксации: параллельный запрос не должен увидеть новую версию
+    # раньше, чем её можно прочитать из базы
+    pk, version = instance.pk, instance.token_version
+    transaction.on_commit(lambda: set_token_version(pk, version))
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_token_version(sender, instance, **kwargs):
+    forget_token_version(instance.pk)
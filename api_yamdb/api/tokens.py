@@ -0,0 +1,87 @@
+"""Access tokens carrying the user's role.
+
+`RoleAccessToken` adds the `role`, `is_superuser` and `ver` (token
+version) claims, so that permission classes can decide without loading
+the user. Changing the role or activity of a user increments
+`User.token_version`: with `ROLE_CLAIMS["CHECK_VERSION"]` the claims of
+older tokens are ignored and permissions fall back to `request.user`.
+The current versions are kept in the cache for `ROLE_CLAIMS["TIMEOUT"]`
+seconds and loaded from the DB on a cache miss: with a per-process cache
+(locmem) other processes see a new version only after the timeout.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+
+ROLE_CLAIM = "role"
+SUPERUSER_CLAIM = "is_superuser"
+VERSION_CLAIM = "ver"
+
+
+class RoleAccessToken(AccessToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[SUPERUSER_CLAIM] = user.is_superuser
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+def get_cache():
+    return caches[settings.ROLE_CLAIMS["CACHE_ALIAS"]]
+
+
+def token_version_key(user_id) -> str:
+    return f"auth:token_version:{user_id}"
+
+
+def get_token_version(user_id):
+    """Current token version of the user, None for a deleted user."""
+    cache = get_cache()
+    key = token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (
+            User.objects.filter(pk=user_id)
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        if version is not None:
+            # add(): версия, записанная после фиксации изменения, не
+            # затирается прочитанной до неё
+            cache.add(key, version, settings.ROLE_CLAIMS["TIMEOUT"])
+    return version
+
+
+def set_token_version(user_id, version) -> None:
+    get_cache().set(
+        token_version_key(user_id), version, settings.ROLE_CLAIMS["TIMEOUT"]
+    )
+
+
+def forget_token_version(user_id) -> None:
+    get_cache().delete(token_version_key(user_id))
+
+
+def role_claims(request):
+    """Role claims of the request's access token.
+
+    Returns:
+        dict: `role` and `is_superuser` claims, or None when the token
+        has no role claims or they are outdated
+    """
+    token = request.auth
+    if token is None or ROLE_CLAIM not in token:
+        return None
+    if settings.ROLE_CLAIMS["CHECK_VERSION"] and token.get(
+        VERSION_CLAIM
+    ) != get_token_version(token.get(api_settings.USER_ID_CLAIM)):
+        return None
+    return {
+        ROLE_CLAIM: token[ROLE_CLAIM],
+        SUPERUSER_CLAIM: token.get(SUPERUSER_CLAIM, False),
+    }
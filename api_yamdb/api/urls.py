@@ -9,6 +9,7 @@ from .views import (
     ReviewViewSet,
     TitleViewSet,
     UserViewSet,
+    reviews_bulk_create,
     signup,
     signup_confirm,
 )
@@ -36,5 +37,6 @@ auth_urls = [
 
 urlpatterns = [
     path("v1/auth/", include(auth_urls)),
+    path("v1/titles/reviews/bulk/", reviews_bulk_create),
     path("v1/", include(v1_router.urls)),
 ]
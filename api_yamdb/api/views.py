@@ -1,18 +1,40 @@
-from api.filters import CategoryGenreFilter
+from api.filters import CategoryGenreFilter, TitleSearchFilter
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, serializers, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import (
+    action,
+    api_view,
+    permission_classes,
+)
 from rest_framework.filters import SearchFilter
 from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Review,
+    ScoreHistogram,
+    Title,
+    User,
+)
+from users.outbox import enqueue_email
 
+from .bulk import ReviewBulkIngestion
+from .cache import CachedListMixin, TitleETagMixin
+from .pagination import (
+    PubDateKeysetPagination,
+    PubDatePagination,
+    TitlePagination,
+)
 from .permissions import (
     IsAdmin,
     IsModerator,
@@ -22,16 +44,20 @@ from .permissions import (
 )
 from .serializers import (
     CategorySerializer,
+    CommentFlatSerializer,
     CommentSerializer,
     GenreSerializer,
+    ReviewFlatSerializer,
     ReviewSerializer,
     TitleCreateSerializer,
     TitleSerializer,
+    TitleTopSerializer,
     UserEditSerializer,
     UserSerializer,
     UserSignupConfirmSerializer,
     UserSignupSerializer,
 )
+from .tokens import RoleAccessToken
 
 
 class ListCreateDestroyViewSet(
@@ -43,44 +69,146 @@ class ListCreateDestroyViewSet(
     pass
 
 
-class CategoryViewSet(PermissionPerMethodMixin, ListCreateDestroyViewSet):
+class FlatListMixin:
+    """Serializes list pages with `flat_serializer_class` projection"""
+
+    flat_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.flat_serializer_class()
+        queryset = serializer.project(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(queryset))
+
+
+class TopTitlesMixin:
+    """Adds `top` action: best titles of the object by weighted rating.
+
+    Titles are ranked by the Bayesian average kept in `weighted_rating`,
+    so that a title with a couple of perfect scores does not outrank
+    a well-known one. Titles without reviews are not ranked.
+
+    Subclasses declare where the rating is read from: `top_model` keeping
+    a copy of `weighted_rating`, its `top_lookup` field referencing the
+    viewset's object and `top_title_field` holding the title id.
+    """
+
+    top_model = None
+    top_lookup = None
+    top_title_field = "id"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.top_model is None or cls.top_lookup is None:
+            raise ImproperlyConfigured(
+                f"{cls.__name__} must set top_model and top_lookup"
+            )
+
+    def get_top_title_ids(self, instance, limit):
+        return (
+            self.top_model.objects.filter(
+                **{self.top_lookup: instance}, weighted_rating__isnull=False
+            )
+            .order_by("-weighted_rating", f"-{self.top_title_field}")
+            .values_list(self.top_title_field, flat=True)[:limit]
+        )
+
+    def get_top_limit(self, request):
+        options = settings.LEADERBOARD
+        limit = request.query_params.get("limit")
+        try:
+            limit = int(limit) if limit else options["LIMIT"]
+        except ValueError:
+            raise serializers.ValidationError(
+                {"limit": "Ожидается целое число"}
+            )
+        return max(0, min(limit, options["MAX_LIMIT"]))
+
+    @action(detail=True, methods=("get",))
+    def top(self, request, slug=None):
+        title_ids = list(
+            self.get_top_title_ids(
+                self.get_object(), self.get_top_limit(request)
+            )
+        )
+        titles = Title.objects.for_read().in_bulk(title_ids)
+        serializer = TitleTopSerializer(
+            [titles[pk] for pk in title_ids if pk in titles], many=True
+        )
+        return Response(serializer.data)
+
+
+class CategoryViewSet(
+    CachedListMixin,
+    TopTitlesMixin,
+    PermissionPerMethodMixin,
+    ListCreateDestroyViewSet,
+):
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
     lookup_field = "slug"
     permission_classes_per_method = {
         "list": (ReadOnly,),
+        "top": (ReadOnly,),
         "create": (IsAdmin,),
         "destroy": (IsAdmin,),
     }
     filter_backends = (SearchFilter,)
     search_fields = ("name",)
     pagination_class = LimitOffsetPagination
+    cache_dependencies = (Category,)
+    # Обход индекса title_category_top_idx в обратном порядке
+    top_model = Title
+    top_lookup = "category"
 
 
-class GenreViewSet(PermissionPerMethodMixin, ListCreateDestroyViewSet):
+class GenreViewSet(
+    CachedListMixin,
+    TopTitlesMixin,
+    PermissionPerMethodMixin,
+    ListCreateDestroyViewSet,
+):
     serializer_class = GenreSerializer
     queryset = Genre.objects.all()
     lookup_field = "slug"
     permission_classes_per_method = {
         "list": (ReadOnly,),
+        "top": (ReadOnly,),
         "create": (IsAdmin,),
         "destroy": (IsAdmin,),
     }
     filter_backends = (SearchFilter,)
     search_fields = ("name",)
     pagination_class = LimitOffsetPagination
+    cache_dependencies = (Genre,)
+    # Рейтинг скопирован в связи жанра: обход genretitle_genre_top_idx
+    # без соединения с произведениями
+    top_model = GenreTitle
+    top_lookup = "genre"
+    top_title_field = "title_id"
 
 
-class TitleViewSet(PermissionPerMethodMixin, viewsets.ModelViewSet):
+class TitleViewSet(
+    CachedListMixin,
+    TitleETagMixin,
+    PermissionPerMethodMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = TitleSerializer
     queryset = Title.objects.all()
     permission_classes_per_method = {
         "list": (ReadOnly,),
+        "facets": (ReadOnly,),
+        "histogram": (ReadOnly,),
         "partial_update": (IsAdmin,),
         "create": (IsAdmin,),
         "destroy": (IsAdmin,),
     }
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter)
     filterset_class = CategoryGenreFilter
     filterset_fields = (
         "name",
@@ -88,17 +216,141 @@ class TitleViewSet(PermissionPerMethodMixin, viewsets.ModelViewSet):
         "category__slug",
         "genre__slug",
     )
-    pagination_class = LimitOffsetPagination
+    pagination_class = TitlePagination
+    cache_dependencies = (Title, Review, Genre, GenreTitle, Category)
+    etag_actions = ("retrieve",)
+    title_url_kwarg = "pk"
+
+    def get_queryset(self):
+        if self.action == "retrieve" or self.action == "list":
+            return Title.objects.for_read()
+        return super().get_queryset()
 
     def get_serializer_class(self):
         if self.action == "retrieve" or self.action == "list":
             return TitleSerializer
         return TitleCreateSerializer
 
+    def get_include(self, request):
+        """Parses `include` and limits of the embedded reviews and comments.
 
-class ReviewViewSet(PermissionPerMethodMixin, viewsets.ModelViewSet):
+        Returns:
+            dict: limits by relation, e.g. {"reviews": 10, "comments": 3}
+        """
+        options = settings.TITLE_INCLUDE
+        relations = ("reviews", "comments")
+        include = {
+            relation
+            for relation in request.query_params.get("include", "").split(",")
+            if relation
+        }
+        unknown = include.difference(relations)
+        if unknown:
+            raise serializers.ValidationError(
+                {"include": f"Неизвестные связи: {', '.join(sorted(unknown))}"}
+            )
+        if "comments" in include:
+            include.add("reviews")
+        if len(include) > options["MAX_DEPTH"]:
+            raise serializers.ValidationError(
+                {
+                    "include": (
+                        "Глубина вложенности не более "
+                        f"{options['MAX_DEPTH']}"
+                    )
+                }
+            )
+
+        limits = {}
+        for relation in relations:
+            if relation not in include:
+                continue
+            limit = request.query_params.get(f"{relation}_limit")
+            try:
+                limit = int(limit) if limit else options["LIMITS"][relation]
+            except ValueError:
+                raise serializers.ValidationError(
+                    {f"{relation}_limit": "Ожидается целое число"}
+                )
+            limits[relation] = max(
+                0, min(limit, options["MAX_LIMITS"][relation])
+            )
+        return limits
+
+    def get_included(self, title_id, limits):
+        """Latest reviews of the title with their latest comments.
+
+        Two queries regardless of the page sizes: reviews of the page, then
+        comments of all these reviews, each limited per review in SQL.
+        """
+        reviews_serializer = ReviewFlatSerializer()
+        reviews = reviews_serializer.serialize(
+            reviews_serializer.project(
+                Review.objects.filter(title_id=title_id).order_by(
+                    "-pub_date", "-id"
+                )[: limits["reviews"]]
+            )
+        )
+        if "comments" not in limits:
+            return {"reviews": reviews}
+
+        latest = Comment.objects.filter(review=OuterRef("review")).order_by(
+            "-pub_date", "-id"
+        )
+        comments_serializer = CommentFlatSerializer()
+        rows = (
+            Comment.objects.filter(
+                review__in=[review["id"] for review in reviews],
+                pk__in=Subquery(latest.values("pk")[: limits["comments"]]),
+            )
+            .order_by("-pub_date", "-id")
+            .values("review_id", *comments_serializer.projection.values())
+        )
+        comments = {review["id"]: [] for review in reviews}
+        for row, comment in zip(rows, comments_serializer.serialize(rows)):
+            comments[row["review_id"]].append(comment)
+        for review in reviews:
+            review["comments"] = comments[review["id"]]
+        return {"reviews": reviews}
+
+    def retrieve(self, request, *args, **kwargs):
+        limits = self.get_include(request)
+        response = super().retrieve(request, *args, **kwargs)
+        if limits and response.status_code == status.HTTP_200_OK:
+            response.data.update(
+                self.get_included(response.data["id"], limits)
+            )
+        return response
+
+    @action(detail=False, methods=("get",))
+    def facets(self, request):
+        """Counts of the filtered titles per category, genre and decade"""
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(queryset.facets())
+
+    @action(detail=True, methods=("get",))
+    def histogram(self, request, pk=None):
+        """Distribution of review scores of the title"""
+        title = get_object_or_404(
+            Title.objects.select_related("score_histogram"), pk=pk
+        )
+        try:
+            histogram = title.score_histogram
+        except ScoreHistogram.DoesNotExist:
+            histogram = ScoreHistogram(title=title)
+        return Response(histogram.as_dict())
+
+
+class ReviewViewSet(
+    TitleETagMixin,
+    FlatListMixin,
+    PermissionPerMethodMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = ReviewSerializer
-    pagination_class = LimitOffsetPagination
+    flat_serializer_class = ReviewFlatSerializer
+    pagination_class = PubDatePagination
+    etag_actions = ("list",)
     permission_classes_per_method = {
         "create": (IsAuthenticated,),
         "list": (ReadOnly,),
@@ -107,30 +359,45 @@ class ReviewViewSet(PermissionPerMethodMixin, viewsets.ModelViewSet):
         "destroy": (IsOwner | IsModerator | IsAdmin,),
     }
 
+    def get_title(self):
+        if not hasattr(self, "_title"):
+            self._title = get_object_or_404(
+                Title, id=self.kwargs.get("title_id")
+            )
+        return self._title
+
     def get_queryset(self, *args, **kwargs):
-        title_id = self.kwargs.get("title_id")
-        title = get_object_or_404(Title, id=title_id)
-        return Review.objects.filter(title=title)
+        return Review.objects.filter(title=self.get_title()).order_by("id")
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get("title_id")
-        title = get_object_or_404(Title, id=title_id)
-
-        # Validate that user can post a single review only
-        if Review.objects.filter(
-            title=title, author=self.request.user
-        ).exists():
+        # Единственность отзыва пользователя обеспечивает ограничение
+        # author_title: отдельная проверка .exists() не защищает от гонки.
+        # Рейтинг обновляется сигналами Review в той же транзакции
+        title = self.get_title()
+        try:
+            with transaction.atomic():
+                serializer.save(title=title, author=self.request.user)
+        except IntegrityError:
             raise serializers.ValidationError(
                 "Пользователь может оставить только один отзыв "
                 "на произведение"
             )
 
-        serializer.save(title=title, author=self.request.user)
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
 
 
-class CommentViewSet(PermissionPerMethodMixin, viewsets.ModelViewSet):
+class CommentViewSet(
+    FlatListMixin, PermissionPerMethodMixin, viewsets.ModelViewSet
+):
     serializer_class = CommentSerializer
-    pagination_class = LimitOffsetPagination
+    flat_serializer_class = CommentFlatSerializer
+    pagination_class = PubDatePagination
     permission_classes_per_method = {
         "create": (IsAuthenticated,),
         "list": (ReadOnly,),
@@ -143,14 +410,21 @@ class CommentViewSet(PermissionPerMethodMixin, viewsets.ModelViewSet):
         title_id = self.kwargs.get("title_id")
         review_id = self.kwargs.get("review_id")
         review = get_object_or_404(Review, title_id=title_id, id=review_id)
-        return Comment.objects.filter(review=review)
+        return Comment.objects.filter(review=review).order_by("id")
 
+    # Счётчик комментариев отзыва обновляется сигналами Comment в той же
+    # транзакции, что и запись комментария
+    @transaction.atomic
     def perform_create(self, serializer):
         title_id = self.kwargs.get("title_id")
         review_id = self.kwargs.get("review_id")
         review = get_object_or_404(Review, title_id=title_id, id=review_id)
         serializer.save(review=review, author=self.request.user)
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -170,31 +444,96 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def me(self, request):
         if request.method == "PATCH":
-            serializer = UserEditSerializer(request.user, data=request.data)
+            # request.user может быть взят из кэша аутентификации: запись
+            # устаревшего экземпляра отменила бы, например, смену роли
+            user = User.objects.get(pk=request.user.pk)
+            serializer = UserEditSerializer(user, data=request.data)
             serializer.is_valid(raise_exception=True)
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
         serializer = UserEditSerializer(request.user)
         return Response(serializer.data)
 
+    def get_author_feed(self, request, queryset, flat_serializer_class):
+        """Cursor-paginated feed of the author's records, newest first"""
+        author = get_object_or_404(User, username=self.kwargs["username"])
+        serializer = flat_serializer_class()
+        paginator = PubDateKeysetPagination()
+        page = paginator.paginate_queryset(
+            serializer.project(queryset.filter(author=author)), request, self
+        )
+        return paginator.get_paginated_response(serializer.serialize(page))
+
+    @action(detail=True, methods=("get",), permission_classes=(ReadOnly,))
+    def reviews(self, request, username=None):
+        return self.get_author_feed(
+            request, Review.objects.all(), ReviewFlatSerializer
+        )
+
+    @action(detail=True, methods=("get",), permission_classes=(ReadOnly,))
+    def comments(self, request, username=None):
+        return self.get_author_feed(
+            request, Comment.objects.all(), CommentFlatSerializer
+        )
+
+
+@api_view(["POST"])
+@permission_classes((IsAdmin,))
+def reviews_bulk_create(request):
+    """Массовая загрузка отзывов от партнёров.
+
+    Принимает список записей (title_id, author, text, score, pub_date),
+    создаёт корректные и возвращает ошибки остальных по индексу записи.
+    """
+    records = request.data
+    if not isinstance(records, list):
+        return Response(
+            {"Ошибка": "Ожидается список отзывов"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    max_records = settings.REVIEW_BULK["MAX_RECORDS"]
+    if len(records) > max_records:
+        return Response(
+            {"Ошибка": f"Не более {max_records} отзывов за запрос"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    ingestion = ReviewBulkIngestion(records)
+    try:
+        created = ingestion.save()
+    except IntegrityError:
+        # Отзыв с той же парой автор-произведение появился после проверки
+        return Response(
+            {"Ошибка": "Данные изменились во время загрузки, повторите"},
+            status=status.HTTP_409_CONFLICT,
+        )
+    return Response(
+        {"created": created, "errors": ingestion.errors},
+        status=(
+            status.HTTP_201_CREATED
+            if created or not records
+            else status.HTTP_400_BAD_REQUEST
+        ),
+    )
+
 
 @api_view(["POST"])
 def signup(request):
-    """Код подтерждения выводится в консоль."""
+    """Код подтверждения отправляется командой send_outbox."""
 
     serializer = UserSignupSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    user, _ = User.objects.get_or_create(
-        defaults={"is_active": False}, **serializer.validated_data
-    )
-    user.save()
-    send_mail(
-        "Подтверждение регистрации",
-        f"Код подтверждения: {default_token_generator.make_token(user)}",
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email],
-        fail_silently=True,
-    )
+    # Письмо ставится в очередь в той же транзакции, что и пользователь:
+    # запрос не ждёт почтовый сервер
+    with transaction.atomic():
+        user, _ = User.objects.get_or_create(
+            defaults={"is_active": False}, **serializer.validated_data
+        )
+        user.save()
+        enqueue_email(
+            "Подтверждение регистрации",
+            f"Код подтверждения: {default_token_generator.make_token(user)}",
+            user.email,
+        )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -213,7 +552,7 @@ def signup_confirm(request):
         raise serializers.ValidationError("Неверный confirmation_code")
     user.is_active = True
     user.save()
-    token = str(AccessToken.for_user(user))
+    token = str(RoleAccessToken.for_user(user))
     return Response(
         {"Ваш токен": token},
         status=status.HTTP_200_OK,
@@ -57,6 +57,74 @@ TEMPLATES = [
 WSGI_APPLICATION = "api_yamdb.wsgi.application"
 
 
+# Cache
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Кэш ответов на анонимные запросы списков (api.cache.CachedListMixin).
+# В нём же хранятся версии данных моделей (reviews.versions), поэтому ответы
+# кэшируются только в общем для процессов бэкенде (Memcached, Redis): с
+# locmem изменения из других процессов и команд импорта не были бы видны
+RESPONSE_CACHE = {
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 300,
+}
+
+# Кэш пользователей для аутентификации по JWT (api.authentication).
+# Записи удаляются при изменении пользователя; TIMEOUT ограничивает срок,
+# за который изменение дойдёт до процессов с собственным кэшем
+AUTH_USER_CACHE = {
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 60,
+}
+
+# Роль в токенах доступа (api.tokens). CHECK_VERSION: игнорировать роль
+# из токенов, выданных до смены роли или блокировки пользователя.
+# TIMEOUT ограничивает срок, за который новая версия токенов дойдёт до
+# процессов с собственным кэшем
+ROLE_CLAIMS = {
+    "CACHE_ALIAS": "default",
+    "CHECK_VERSION": True,
+    "TIMEOUT": 60,
+}
+
+# Фильтрация произведений по жанрам и категориям через индекс в памяти
+# (reviews.membership). Работает только с общим для процессов кэшем версий
+# (RESPONSE_CACHE); фильтры, под которые попадает больше MAX_IDS
+# произведений, выполняются соединением таблиц
+TITLE_MEMBERSHIP_INDEX = {
+    "ENABLED": False,
+    "MAX_IDS": 10000,
+}
+
+# Вложенные отзывы и комментарии в /api/v1/titles/{id}/?include=...
+TITLE_INCLUDE = {
+    "MAX_DEPTH": 2,
+    "LIMITS": {"reviews": 10, "comments": 3},
+    "MAX_LIMITS": {"reviews": 100, "comments": 20},
+}
+
+# Рейтинг лучших произведений по байесовской оценке:
+# (MIN_VOTES * PRIOR_MEAN + сумма оценок) / (MIN_VOTES + число оценок).
+# После изменения нужно выполнить manage.py rebuild_counters
+LEADERBOARD = {
+    "PRIOR_MEAN": 6.0,
+    "MIN_VOTES": 10,
+    "LIMIT": 10,
+    "MAX_LIMIT": 100,
+}
+
+# Массовая загрузка отзывов (/api/v1/titles/reviews/bulk/)
+REVIEW_BULK = {
+    "MAX_RECORDS": 10000,
+    "BATCH_SIZE": 400,
+}
+
+
 # Database
 
 DATABASES = {
@@ -104,11 +172,20 @@ DEFAULT_FROM_EMAIL = "from@example.com"
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# Очередь писем (manage.py send_outbox): неудачная отправка повторяется
+# через RETRY_DELAY * 2 ** (попытка - 1) секунд, но не позже MAX_RETRY_DELAY
+EMAIL_OUTBOX = {
+    "BATCH_SIZE": 100,
+    "MAX_ATTEMPTS": 8,
+    "RETRY_DELAY": 60,
+    "MAX_RETRY_DELAY": 3600,
+}
+
 AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
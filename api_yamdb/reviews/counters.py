@@ -0,0 +1,248 @@
+"""Maintenance of denormalized counters stored on reviews models.
+
+Review writes update the rating counters, the Bayesian weighted rating
+(on the title and its genre links, for the leaderboards) and the score
+histogram of the title in the same transaction. Besides that every review
+write increments `Title.version`, the change version used to validate
+cached representations of the title and its reviews.
+
+All updates are expressed with ``F()`` so that they are applied atomically
+by the database and never read-modify-write a stale value.
+"""
+
+from collections import Counter
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db.models import (
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+from .models import Comment, GenreTitle, Review, ScoreHistogram, Title
+
+
+def weighted_rating(sum_delta: int = 0, count_delta: int = 0):
+    """Bayesian average of the title's scores as an SQL expression.
+
+    `(C * m + sum) / (C + count)`, where `m` is the prior mean and `C` the
+    minimum votes weight from `settings.LEADERBOARD`. The deltas are added
+    to the stored counters, since within an UPDATE the expression sees
+    the old values. Titles without reviews get NULL.
+    """
+    prior_mean = float(settings.LEADERBOARD["PRIOR_MEAN"])
+    min_votes = settings.LEADERBOARD["MIN_VOTES"]
+    return Case(
+        When(rating_count=-count_delta, then=Value(None)),
+        default=ExpressionWrapper(
+            (min_votes * prior_mean + F("rating_sum") + sum_delta)
+            / (min_votes + F("rating_count") + count_delta),
+            output_field=FloatField(),
+        ),
+        output_field=FloatField(),
+    )
+
+
+def update_rating(title_id: int, sum_delta: int, count_delta: int) -> None:
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F("rating_sum") + sum_delta,
+        rating_count=F("rating_count") + count_delta,
+        weighted_rating=weighted_rating(sum_delta, count_delta),
+        version=F("version") + 1,
+    )
+    sync_genre_ratings(title_id=title_id)
+
+
+def sync_genre_ratings(**filters) -> None:
+    """Copies weighted rating of titles to their genre links."""
+    GenreTitle.objects.filter(**filters).update(
+        weighted_rating=Subquery(
+            Title.objects.filter(pk=OuterRef("title_id")).values(
+                "weighted_rating"
+            )[:1]
+        )
+    )
+
+
+def review_added(title_id: int, score: int) -> None:
+    """Accounts a new review with `score` in the title's rating."""
+    reviews_added(title_id, [score])
+
+
+def reviews_added(title_id: int, scores: list[int]) -> None:
+    """Accounts a batch of new reviews of one title in its rating."""
+    update_rating(title_id, sum(scores), len(scores))
+    update_histogram(title_id, Counter(scores))
+
+
+def review_removed(title_id: int, score: int) -> None:
+    """Removes a deleted review with `score` from the title's rating."""
+    reviews_removed(title_id, [score])
+
+
+def reviews_removed(title_id: int, scores: list[int]) -> None:
+    """Removes a batch of deleted reviews of one title from its rating."""
+    update_rating(title_id, -sum(scores), -len(scores))
+    update_histogram(
+        title_id, {score: -count for score, count in Counter(scores).items()}
+    )
+
+
+def review_changed(title_id: int, old_score: int, new_score: int) -> None:
+    """Moves a review's contribution to the rating from old to new score."""
+    if old_score == new_score:
+        touch_titles(pk=title_id)
+        return
+    update_rating(title_id, new_score - old_score, 0)
+    update_histogram(title_id, {old_score: -1, new_score: 1})
+
+
+def update_histogram(title_id: int, deltas: dict[int, int]) -> None:
+    """Adds `deltas` (score: change) to the title's score histogram."""
+    updates = {
+        ScoreHistogram.field_name(score): (
+            F(ScoreHistogram.field_name(score)) + delta
+        )
+        for score, delta in deltas.items()
+        if delta
+    }
+    histogram = ScoreHistogram.objects.filter(title_id=title_id)
+    if histogram.update(**updates) or any(
+        delta < 0 for delta in deltas.values()
+    ):
+        # Строки нет только у произведения без отзывов (или удаляемого
+        # каскадно), уменьшать в ней нечего
+        return
+    ScoreHistogram.objects.get_or_create(title_id=title_id)
+    histogram.update(**updates)
+
+
+def comment_added(review_id: int) -> None:
+    """Accounts a new comment in the review's comments counter."""
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F("comments_count") + 1
+    )
+    touch_titles(reviews=review_id)
+
+
+def comment_removed(review_id: int, count: int = 1) -> None:
+    """Removes `count` deleted comments from the review's counter."""
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F("comments_count") - count
+    )
+    touch_titles(reviews=review_id)
+
+
+def touch_titles(**filters) -> None:
+    """Increments change version of the titles matching `filters`."""
+    Title.objects.filter(**filters).update(version=F("version") + 1)
+
+
+def titles_in(title_ids: Optional[Iterable[int]] = None):
+    """Titles with `title_ids`, all titles if the ids are not given."""
+    if title_ids is None:
+        return Title.objects.all()
+    return Title.objects.filter(pk__in=title_ids)
+
+
+def rebuild_ratings(title_ids: Optional[Iterable[int]] = None) -> int:
+    """Recalculates rating counters of titles from scratch.
+
+    Args:
+        title_ids: titles to recalculate, all titles by default
+
+    Returns:
+        int: number of updated titles
+    """
+    reviews = (
+        Review.objects.filter(title=OuterRef("pk")).order_by().values("title")
+    )
+    return titles_in(title_ids).update(
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum("score")).values("total")),
+            0,
+        ),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(total=Count("pk")).values("total")),
+            0,
+        ),
+    )
+
+
+def rebuild_weighted_ratings(title_ids: Optional[Iterable[int]] = None) -> int:
+    """Recalculates weighted ratings of titles and their genre links.
+
+    Must be run after the rating counters are rebuilt or the leaderboard
+    prior (`settings.LEADERBOARD`) is changed.
+
+    Args:
+        title_ids: titles to recalculate, all titles by default
+
+    Returns:
+        int: number of updated titles
+    """
+    updated = titles_in(title_ids).update(weighted_rating=weighted_rating())
+    if title_ids is None:
+        sync_genre_ratings()
+    else:
+        sync_genre_ratings(title_id__in=title_ids)
+    return updated
+
+
+def rebuild_comments_counts(review_ids: Optional[Iterable[int]] = None) -> int:
+    """Recalculates comments counters of reviews from scratch.
+
+    Args:
+        review_ids: reviews to recalculate, all reviews by default
+
+    Returns:
+        int: number of updated reviews
+    """
+    comments = (
+        Comment.objects.filter(review=OuterRef("pk"))
+        .order_by()
+        .values("review")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    reviews = Review.objects.all()
+    if review_ids is not None:
+        reviews = reviews.filter(pk__in=review_ids)
+    return reviews.update(comments_count=Coalesce(Subquery(comments), 0))
+
+
+def rebuild_histograms(title_ids: Optional[Iterable[int]] = None) -> int:
+    """Recalculates score histograms of titles from scratch.
+
+    Args:
+        title_ids: titles to recalculate, all titles by default
+
+    Returns:
+        int: number of titles with reviews
+    """
+    histograms = {}
+    reviews = Review.objects.order_by()
+    stored = ScoreHistogram.objects.all()
+    if title_ids is not None:
+        reviews = reviews.filter(title_id__in=title_ids)
+        stored = stored.filter(title_id__in=title_ids)
+    scores = reviews.values_list("title_id", "score").annotate(
+        total=Count("pk")
+    )
+    for title_id, score, total in scores.iterator():
+        histogram = histograms.setdefault(
+            title_id, ScoreHistogram(title_id=title_id)
+        )
+        setattr(histogram, ScoreHistogram.field_name(score), total)
+    stored.delete()
+    ScoreHistogram.objects.bulk_create(histograms.values(), batch_size=500)
+    return len(histograms)
@@ -0,0 +1,200 @@
+"""Layout of the csv dataset (see `static/data`).
+
+Maps dataset files to models and csv columns to model fields, and orders
+the models so that every model is loaded after the models it references.
+Columns may be named after the field (`author`) or its column (`author_id`).
+Files may be gzip-compressed, with the `.gz` suffix added to the name.
+"""
+
+import gzip
+import io
+from csv import reader
+from graphlib import TopologicalSorter
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db.models import Model
+
+DATASET_FILES = {
+    "users.csv": "users.User",
+    "category.csv": "reviews.Category",
+    "genre.csv": "reviews.Genre",
+    "titles.csv": "reviews.Title",
+    "genre_title.csv": "reviews.GenreTitle",
+    "review.csv": "reviews.Review",
+    "comments.csv": "reviews.Comment",
+}
+
+# Столбцы файлов при выгрузке (export_dataset): как в static/data, плюс
+# описание произведения, которого нет в исходном titles.csv
+DATASET_COLUMNS = {
+    "users.csv": (
+        "id",
+        "username",
+        "email",
+        "role",
+        "bio",
+        "first_name",
+        "last_name",
+    ),
+    "category.csv": ("id", "name", "slug"),
+    "genre.csv": ("id", "name", "slug"),
+    "titles.csv": ("id", "name", "year", "category", "description"),
+    "genre_title.csv": ("id", "title_id", "genre_id"),
+    "review.csv": ("id", "title_id", "text", "author", "score", "pub_date"),
+    "comments.csv": ("id", "review_id", "text", "author", "pub_date"),
+}
+
+
+def open_csv(path: str, mode: str = "r"):
+    """Opens a dataset file as text, decompressing `.gz` files."""
+    if path.endswith(".gz"):
+        return gzip.open(path, f"{mode}t", newline="", encoding="utf-8")
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+def open_binary(path: str):
+    """Opens a dataset file for `CsvRecordReader`."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+class CsvRecordReader:
+    """Reads csv records from a binary file, tracking their byte offsets.
+
+    Text-mode readers buffer ahead, so the position of a record in the
+    file is unknown. Here every record is read line by line until its
+    quotes are balanced (values may contain line breaks), so `offset` is
+    the exact end of the last returned record: an interrupted import
+    can continue from it with `seek()`.
+
+    Attributes:
+        offset (int): byte offset after the last returned record
+        records (int): number of returned records, the header included
+    """
+
+    def __init__(self, binary_file, encoding: str = "utf-8"):
+        self.file = binary_file
+        self.encoding = encoding
+        self.offset = binary_file.tell()
+        self.records = 0
+
+    def seek(self, offset: int, records: int) -> None:
+        """Continues reading after `records` records ending at `offset`."""
+        self.file.seek(offset)
+        self.offset = offset
+        self.records = records
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> list[str]:
+        while True:
+            lines, quotes = [], 0
+            while not lines or quotes % 2:
+                line = self.file.readline()
+                if not line:
+                    break
+                lines.append(line)
+                quotes += line.count(b'"')
+            if not lines:
+                raise StopIteration
+            record = b"".join(lines)
+            self.offset += len(record)
+            text = record.decode(self.encoding)
+            if text.strip():
+                self.records += 1
+                return next(reader(io.StringIO(text, newline="")))
+
+
+def column_fields(model: Model, header: list[str]) -> list[str]:
+    """Model field names of the csv columns, `attname` for foreign keys.
+
+    Raises:
+        ValueError: if a column matches no field of the model
+    """
+    names = {}
+    for field in model._meta.concrete_fields:
+        names[field.name] = field.attname
+        names[field.attname] = field.attname
+    unknown = [column for column in header if column not in names]
+    if unknown:
+        raise ValueError(
+            f"Unknown columns of {model.__name__}: {', '.join(unknown)}"
+        )
+    return [names[column] for column in header]
+
+
+def load_order(models: list[Model]) -> list[Model]:
+    """Orders models so that referenced models go first."""
+    graph = {
+        model: {
+            field.related_model
+            for field in model._meta.concrete_fields
+            if field.is_relation
+            and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+    return list(TopologicalSorter(graph).static_order())
+
+
+def python_value(field, value):
+    """Converts a csv value to the python type of the field."""
+    if value == "" and field.null:
+        return None
+    if field.is_relation:
+        return field.target_field.to_python(value)
+    return field.to_python(value)
+
+
+def clean_value(field, value):
+    """Converts a csv value to the python value of the field and validates it.
+
+    References are only converted: their existence is checked on import.
+    """
+    value = python_value(field, value)
+    if field.is_relation or (value is None and field.null):
+        return value
+    return field.clean(value, None)
+
+
+def parse_file(
+    path: str, model_label: str
+) -> tuple[list[str], list[dict], list[tuple[int, str]]]:
+    """Reads and validates a dataset file without querying the database.
+
+    Runs in worker processes of the `load_dataset` command.
+
+    Returns:
+        tuple: field names, valid rows as dicts of field values and
+            errors of the other rows as (line number, message)
+    """
+    model = apps.get_model(model_label)
+    rows, errors = [], []
+    with open_csv(path) as csv_file:
+        csv_reader = reader(csv_file)
+        field_names = column_fields(model, next(csv_reader))
+        fields = [model._meta.get_field(name) for name in field_names]
+        for row in csv_reader:
+            if len(row) != len(fields):
+                errors.append(
+                    (
+                        csv_reader.line_num,
+                        f"expected {len(fields)} values, got {len(row)}",
+                    )
+                )
+                continue
+            values, messages = {}, []
+            for field, value in zip(fields, row):
+                try:
+                    values[field.attname] = clean_value(field, value)
+                except ValidationError as e:
+                    messages.append(f"{field.name}: {'; '.join(e.messages)}")
+            if messages:
+                errors.append((csv_reader.line_num, ", ".join(messages)))
+            else:
+                rows.append(values)
+    return field_names, rows, errors
@@ -0,0 +1,96 @@
+import time
+import uuid
+
+from api.serializers import ReviewFlatSerializer, ReviewSerializer
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Review, Title
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rendering time of ReviewFlatSerializer and ReviewSerializer "
+        "on generated reviews, which are rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reviews",
+            type=int,
+            default=1000,
+            help="number of reviews on the page",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=5,
+            help="rounds per serializer, the best one is reported",
+        )
+
+    @staticmethod
+    def create_reviews(size: int):
+        """Creates a title with `size` reviews of new users."""
+        title = Title.objects.create(name="Benchmark", year=2000)
+        # Уникальный префикс: имена не пересекаются с данными базы
+        prefix = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create(
+            User(username=f"{prefix}-{i}", email=f"{prefix}-{i}@yamdb.fake")
+            for i in range(size)
+        )
+        Review.objects.bulk_create(
+            Review(
+                title=title,
+                author=author,
+                text=f"Review {i}",
+                score=i % 10 + 1,
+            )
+            for i, author in enumerate(
+                User.objects.filter(
+                    username__in=[user.username for user in users]
+                )
+            )
+        )
+        return Review.objects.filter(title=title).order_by("id")
+
+    @staticmethod
+    def measure(render, rounds: int) -> tuple[float, bytes]:
+        """Best time of `rounds` calls of `render` and its result."""
+        best = None
+        for _ in range(rounds):
+            started = time.perf_counter()
+            content = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, content
+
+    def handle(self, *args, **options):
+        if options["reviews"] < 1 or options["rounds"] < 1:
+            raise CommandError("--reviews and --rounds must be positive")
+        renderer = JSONRenderer()
+        flat = ReviewFlatSerializer()
+        # Сгенерированные данные не остаются в базе
+        with transaction.atomic():
+            queryset = self.create_reviews(options["reviews"])
+            drf_time, drf_content = self.measure(
+                lambda: renderer.render(
+                    ReviewSerializer(queryset.all(), many=True).data
+                ),
+                options["rounds"],
+            )
+            flat_time, flat_content = self.measure(
+                lambda: renderer.render(
+                    flat.serialize(flat.project(queryset.all()))
+                ),
+                options["rounds"],
+            )
+            transaction.set_rollback(True)
+
+        if flat_content != drf_content:
+            raise CommandError("Serializers rendered different JSON!")
+        self.stdout.write(
+            f"{options['reviews']} reviews: ModelSerializer "
+            f"{drf_time * 1000:.1f} ms, flat {flat_time * 1000:.1f} ms "
+            f"({drf_time / flat_time:.1f}x)"
+        )
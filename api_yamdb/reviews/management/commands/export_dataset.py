@@ -0,0 +1,89 @@
+import os
+from csv import writer
+from datetime import datetime, timezone
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from reviews.dataset import (
+    DATASET_COLUMNS,
+    DATASET_FILES,
+    column_fields,
+    open_csv,
+)
+
+
+def csv_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return (
+            value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+        )
+    return str(value)
+
+
+class Command(BaseCommand):
+    help = "Export all models to csv files in the layout of static/data"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output_dir", type=str, help="directory for the csv files"
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="compress the files, adding the .gz suffix",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="rows fetched from the database at a time",
+        )
+
+    def export_model(self, model, path, columns, chunk_size) -> int:
+        """Streams rows of the model to the csv file in primary key order.
+
+        Returns:
+            int: number of exported rows
+        """
+        rows = (
+            model._default_manager.order_by("pk")
+            .values_list(*column_fields(model, columns))
+            .iterator(chunk_size=chunk_size)
+        )
+        count = 0
+        with open_csv(path, "w") as csv_file:
+            csv_writer = writer(csv_file)
+            csv_writer.writerow(columns)
+            for row in rows:
+                csv_writer.writerow([csv_value(value) for value in row])
+                count += 1
+        return count
+
+    def handle(self, *args, **options):
+        os.makedirs(options["output_dir"], exist_ok=True)
+        suffix = ".gz" if options["gzip"] else ""
+
+        # Все файлы читаются в одной транзакции: выгрузка согласована,
+        # даже если данные меняются во время её работы
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, "
+                        "READ ONLY"
+                    )
+            for file_name, model_label in DATASET_FILES.items():
+                path = os.path.join(options["output_dir"], file_name + suffix)
+                count = self.export_model(
+                    apps.get_model(model_label),
+                    path,
+                    DATASET_COLUMNS[file_name],
+                    options["chunk_size"],
+                )
+                if options["verbosity"] > 0:
+                    self.stdout.write(
+                        self.style.SUCCESS(f"Exported {count} rows to {path}.")
+                    )
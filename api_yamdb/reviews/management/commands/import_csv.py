@@ -1,22 +1,129 @@
-from csv import reader
+import json
+import os
+import time
+from datetime import timedelta
 from importlib import import_module
-from typing import Optional
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
 
+from api.authentication import forget_user
+from api.tokens import forget_token_version
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.db.models import Model
 from django.db.models.fields.related import RelatedField
+from reviews import counters, versions
+from reviews.dataset import (
+    CsvRecordReader,
+    clean_value,
+    open_binary,
+    python_value,
+)
+from reviews.models import Comment, GenreTitle, Review, Title
+from users.models import User
+from users.signals import ACCESS_FIELDS
 
 APP_MODELS = "reviews.models"
+# Поле строки, по которому находятся её денормализованные данные:
+# рейтинг и гистограмма произведения, счётчик комментариев отзыва
+REFRESH_KEYS = {
+    Title: "id",
+    GenreTitle: "title_id",
+    Review: "title_id",
+    Comment: "review_id",
+}
+
+
+class ImportProgress:
+    """Reports rows/s, ETA and error rate every `interval` seconds."""
+
+    def __init__(
+        self,
+        stdout,
+        interval: float,
+        total_bytes: Optional[int] = None,
+        start_bytes: int = 0,
+        start_rows: int = 0,
+    ):
+        self.stdout = stdout
+        self.interval = interval
+        self.total_bytes = total_bytes
+        self.start_bytes = start_bytes
+        self.start_rows = start_rows
+        self.started = self.reported = time.monotonic()
+
+    def update(self, rows: int, failed: int, offset: int) -> None:
+        now = time.monotonic()
+        if not self.interval or now - self.reported < self.interval:
+            return
+        self.reported = now
+        elapsed = now - self.started
+        rate = (rows - self.start_rows) / elapsed
+        message = f"{rows} rows, {rate:.0f} rows/s"
+        if self.total_bytes:
+            message += f", {offset / self.total_bytes:.0%}"
+            bytes_rate = (offset - self.start_bytes) / elapsed
+            if bytes_rate:
+                eta = (self.total_bytes - offset) / bytes_rate
+                message += f", ETA {timedelta(seconds=round(eta))}"
+        processed = rows - self.start_rows
+        if processed:
+            message += f", errors {failed} ({failed / processed:.2%})"
+        self.stdout.write(message)
 
 
 class Command(BaseCommand):
     help = "Import data from .csv file to model"
 
     def add_arguments(self, parser):
-        parser.add_argument("csv_file", type=str, help="specify .csv file")
+        parser.add_argument(
+            "csv_file", type=str, help="specify .csv (or .csv.gz) file"
+        )
         parser.add_argument(
             "model_name", type=str, help="specify model name to import"
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="import rows in chunks with bulk_create and bulk_update",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="rows per transaction in --bulk mode",
+        )
+        parser.add_argument(
+            "--diff",
+            action="store_true",
+            help="write only new and changed rows (implies --bulk)",
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="with --diff, delete rows missing from the file",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            default=None,
+            help=(
+                "file recording the last committed row in --bulk mode, "
+                "<csv_file>.checkpoint by default"
+            ),
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="continue an interrupted --bulk import from the checkpoint",
+        )
+        parser.add_argument(
+            "--progress-interval",
+            type=float,
+            default=10.0,
+            help="seconds between progress reports, 0 to disable",
+        )
 
     def get_model(
         self,
@@ -71,10 +178,33 @@ class Command(BaseCommand):
             if isinstance(field, RelatedField)
         }
 
+    def report_error(self, error, verbosity: int = 1) -> None:
+        if verbosity > 0:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"Can't create or update model instance: {error}"
+                )
+            )
+
     def update_or_create(
         self, model: Model, fields: dict[str, str], verbosity: int = 1
-    ) -> None:
-        """Updates model or creates if model with specified id doesn't exist"""
+    ) -> Optional[str]:
+        """Updates model or creates if model with specified id doesn't exist
+
+        Returns:
+            Optional[str]: "created" or "updated", None if saving failed
+        """
+
+        try:
+            # Значения приводятся к типам полей: сигналы моделей
+            # (например, пересчёт рейтинга) ожидают числа, а не строки
+            fields = {
+                name: python_value(model._meta.get_field(name), value)
+                for name, value in fields.items()
+            }
+        except ValidationError as e:
+            self.report_error(e, verbosity)
+            return None
 
         try:
             instance = model.objects.get(id=fields.get("id"))
@@ -87,43 +217,553 @@ class Command(BaseCommand):
             action = "created"
 
         try:
-            instance.save()
+            # Точка сохранения: ошибка строки не прерывает транзакцию
+            # пакета в режиме --bulk
+            with transaction.atomic():
+                instance.save()
         except Exception as e:
-            if verbosity > 0:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f"Can't create or update model instance: {e}"
+            self.report_error(e, verbosity)
+            return None
+        if verbosity > 1:
+            self.stdout.write(f"'{instance!r}' has been {action}.")
+        return action
+
+    @staticmethod
+    def read_chunks(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+        """Yields rows as lists of field dicts, `size` rows at a time"""
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, size))
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def check_references(
+        model: Model, chunk: list[dict]
+    ) -> tuple[list[dict], list[str]]:
+        """Splits out rows referencing missing objects, one query per FK.
+
+        Foreign keys are checked by the database only at commit, which
+        would fail the whole chunk instead of the offending rows.
+
+        Returns:
+            tuple[list[dict], list[str]]: valid rows and errors of others
+        """
+        errors = []
+        for field in model._meta.concrete_fields:
+            if not field.is_relation:
+                continue
+            target = field.target_field
+            references = {}
+            for index, fields in enumerate(chunk):
+                value = fields.get(field.attname)
+                if value in (None, ""):
+                    continue
+                try:
+                    references[index] = target.to_python(value)
+                except ValidationError:
+                    # Неверное значение покажет построчная загрузка
+                    continue
+            if not references:
+                continue
+            existing = set(
+                field.related_model._default_manager.filter(
+                    **{f"{target.attname}__in": set(references.values())}
+                ).values_list(target.attname, flat=True)
+            )
+            valid = []
+            for index, fields in enumerate(chunk):
+                if index in references and references[index] not in existing:
+                    errors.append(
+                        f"{field.related_model.__name__} with "
+                        f"{target.attname}={references[index]} does not "
+                        f"exist (row {fields})"
                     )
+                else:
+                    valid.append(fields)
+            chunk = valid
+        return chunk, errors
+
+    @staticmethod
+    def changed_rows(
+        model: Model, chunk: list[dict], field_names: list[str]
+    ) -> tuple[list[dict], int]:
+        """Drops rows equal to the stored ones.
+
+        Rows are compared by their values normalized with the model fields
+        against one `values_list` read of the stored rows of the chunk.
+        Rows which can't be normalized are kept to be reported on saving.
+
+        Returns:
+            tuple[list[dict], int]: new and changed rows, number of others
+        """
+        if "id" not in field_names:
+            return chunk, 0
+        fields = [model._meta.get_field(name) for name in field_names]
+        id_index = field_names.index("id")
+        normalized = {}
+        for index, row in enumerate(chunk):
+            try:
+                normalized[index] = tuple(
+                    clean_value(field, row.get(field.attname))
+                    for field in fields
                 )
-        else:
+            except ValidationError:
+                continue
+        stored = {
+            values[id_index]: values
+            for values in model.objects.filter(
+                pk__in=[values[id_index] for values in normalized.values()]
+            ).values_list(*field_names)
+        }
+        changed = [
+            row
+            for index, row in enumerate(chunk)
+            if index not in normalized
+            or stored.get(normalized[index][id_index]) != normalized[index]
+        ]
+        return changed, len(chunk) - len(changed)
+
+    def prune(
+        self, model: Model, keep_ids: set, chunk_size: int, verbosity: int = 1
+    ) -> int:
+        """Deletes rows whose ids are not in `keep_ids`, chunk by chunk.
+
+        Returns:
+            int: number of deleted rows
+        """
+        stale = [
+            pk
+            for pk in model.objects.order_by("pk")
+            .values_list("pk", flat=True)
+            .iterator(chunk_size=chunk_size)
+            if pk not in keep_ids
+        ]
+        deleted = 0
+        for start in range(0, len(stale), chunk_size):
+            with transaction.atomic():
+                # delete() отправляет сигналы: счётчики обновляются
+                end = start + chunk_size
+                _, by_model = model.objects.filter(
+                    pk__in=stale[start:end]
+                ).delete()
+            deleted += by_model.get(model._meta.label, 0)
+        if verbosity > 1:
+            self.stdout.write(f"{deleted} stale rows have been deleted.")
+        return deleted
+
+    @staticmethod
+    def bump_token_versions(
+        users: list[User], field_names: list[str]
+    ) -> list[str]:
+        """Increments `token_version` of users whose access fields change.
+
+        bulk_update() does not send the `users` signals doing it on save(),
+        and tokens issued before the import would keep the old role.
+
+        Returns:
+            list[str]: fields to add to bulk_update(), empty if the file
+                has no access fields
+        """
+        access = [name for name in ACCESS_FIELDS if name in field_names]
+        if not access:
+            return []
+        pk = User._meta.pk
+        stored = {
+            values[0]: values[1:]
+            for values in User.objects.filter(
+                pk__in=[pk.to_python(user.pk) for user in users]
+            ).values_list("pk", "token_version", *access)
+        }
+        for user in users:
+            version, *values = stored[pk.to_python(user.pk)]
+            imported = [
+                python_value(User._meta.get_field(name), getattr(user, name))
+                for name in access
+            ]
+            user.token_version = version + (imported != values)
+        return ["token_version"]
+
+    @classmethod
+    def bulk_save(
+        cls, model: Model, chunk: list[dict], field_names: list[str]
+    ) -> tuple[int, int]:
+        """Saves a chunk of rows with one bulk_create and one bulk_update.
+
+        Existing rows are found with a single `id__in` query. Model
+        signals are not sent, see `refresh_denormalized()`; the signals
+        guarding tokens of users are replaced by `bump_token_versions()`.
+
+        Returns:
+            tuple[int, int]: numbers of created and updated rows
+        """
+        pk = model._meta.pk
+        ids = [
+            pk.to_python(fields["id"])
+            for fields in chunk
+            if fields.get("id") not in (None, "")
+        ]
+        existing = set(
+            model.objects.filter(pk__in=ids).values_list("pk", flat=True)
+        )
+        to_create, to_update = [], []
+        for fields in chunk:
+            instance = model(**fields)
+            if (
+                instance.pk is not None
+                and pk.to_python(instance.pk) in existing
+            ):
+                to_update.append(instance)
+            else:
+                to_create.append(instance)
+
+        model.objects.bulk_create(to_create)
+        update_fields = [name for name in field_names if name != "id"]
+        if to_update and update_fields:
+            if model is User:
+                update_fields += cls.bump_token_versions(
+                    to_update, field_names
+                )
+                ids = [pk.to_python(user.pk) for user in to_update]
+
+                def forget_users():
+                    # Кэшированные пользователи и версии токенов устарели
+                    for user_id in ids:
+                        forget_user(user_id)
+                        forget_token_version(user_id)
+
+                transaction.on_commit(forget_users)
+            model.objects.bulk_update(to_update, update_fields)
+        return len(to_create), len(to_update)
+
+    @staticmethod
+    def affected_ids(model: Model, chunk: list[dict]) -> set:
+        """Ids of the objects whose denormalized data depends on the chunk.
+
+        These are titles (reviews for comments) referenced by the rows of
+        the chunk and by the stored rows they overwrite: a review moved to
+        another title changes the ratings of both titles.
+        """
+        key = REFRESH_KEYS.get(model)
+        if key is None:
+            return set()
+        key_field = model._meta.get_field(key)
+        ids, pks = set(), []
+        for fields in chunk:
+            try:
+                ids.add(key_field.to_python(fields.get(key)))
+                pks.append(model._meta.pk.to_python(fields.get("id")))
+            except ValidationError:
+                continue
+        if key != "id":
+            ids.update(
+                model.objects.filter(pk__in=pks).values_list(key, flat=True)
+            )
+        ids.discard(None)
+        return ids
+
+    @staticmethod
+    def refresh_denormalized(model: Model, ids: set) -> None:
+        """Updates the data maintained by model signals after a bulk save.
+
+        bulk_create() and bulk_update() do not send signals, so counters
+        of the objects with `ids` (see `affected_ids()`) are rebuilt from
+        the source tables and the data version is bumped.
+        """
+        if model is Review:
+            counters.rebuild_ratings(ids)
+            counters.rebuild_weighted_ratings(ids)
+            counters.rebuild_histograms(ids)
+        elif model is Comment:
+            counters.rebuild_comments_counts(ids)
+        elif model is GenreTitle:
+            counters.sync_genre_ratings(title_id__in=ids)
+        if model is Comment:
+            counters.touch_titles(reviews__in=ids)
+        elif model in REFRESH_KEYS:
+            counters.touch_titles(pk__in=ids)
+        transaction.on_commit(lambda: versions.bump_version(model))
+
+    def import_chunk(
+        self,
+        model: Model,
+        chunk: list[dict],
+        field_names: list[str],
+        stats: dict[str, int],
+        verbosity: int = 1,
+        diff: bool = False,
+    ) -> None:
+        """Imports one chunk of rows, adding the results to `stats`"""
+        if diff:
+            chunk, unchanged = self.changed_rows(model, chunk, field_names)
+            stats["unchanged"] += unchanged
+            if not chunk:
+                return
+        chunk, errors = self.check_references(model, chunk)
+        for error in errors:
+            self.report_error(error, verbosity)
+            stats["failed"] += 1
+        if not chunk:
+            return
+        affected_ids = self.affected_ids(model, chunk)
+        try:
+            with transaction.atomic():
+                created, updated = self.bulk_save(model, chunk, field_names)
+        except Exception as e:
             if verbosity > 1:
-                self.stdout.write(f"'{instance!r}' has been {action}.")
+                self.stdout.write(
+                    f"Chunk failed ({e}), importing it row by row."
+                )
+            for fields in chunk:
+                action = self.update_or_create(
+                    model=model, fields=fields, verbosity=verbosity
+                )
+                stats[action or "failed"] += 1
+        else:
+            stats["created"] += created
+            stats["updated"] += updated
+        # В той же транзакции, что и пакет: прерванный импорт не оставляет
+        # записанных строк с устаревшими счётчиками
+        self.refresh_denormalized(model, affected_ids)
+        if verbosity > 1:
+            self.stdout.write(f"Chunk of {len(chunk)} rows has been imported.")
+
+    def bulk_import(
+        self,
+        model: Model,
+        rows: Iterable[dict],
+        field_names: list[str],
+        chunk_size: int,
+        verbosity: int = 1,
+        diff: bool = False,
+        on_chunk: Optional[Callable[[dict[str, int]], None]] = None,
+    ) -> dict[str, int]:
+        """Imports rows chunk by chunk, each chunk in its own transaction.
+
+        A chunk which fails as a whole is imported again row by row, each
+        row in a savepoint, to report the failing rows.
+
+        Args:
+            rows: dicts of field values by field name (`attname` for FKs)
+            diff: skip rows equal to the stored ones
+            on_chunk: called with the stats after every committed chunk
+
+        Returns:
+            dict[str, int]: numbers of created, updated, unchanged and
+                failed rows
+        """
+        stats = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        for chunk in self.read_chunks(rows, chunk_size):
+            with transaction.atomic():
+                self.import_chunk(
+                    model, chunk, field_names, stats, verbosity, diff
+                )
+            if on_chunk is not None:
+                on_chunk(stats)
+        return stats
+
+    @staticmethod
+    def tracking_ids(
+        model: Model, rows: Iterable[dict]
+    ) -> tuple[Iterator[dict], set]:
+        """Wraps rows to collect their ids into the returned set."""
+        pk = model._meta.pk
+        ids = set()
+
+        def track():
+            for fields in rows:
+                try:
+                    ids.add(pk.to_python(fields.get("id")))
+                except ValidationError:
+                    pass
+                yield fields
+
+        return track(), ids
+
+    @staticmethod
+    def load_checkpoint(path: str, csv_file: str, model: Model) -> dict:
+        try:
+            with open(path) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+        except FileNotFoundError:
+            raise CommandError(f"Checkpoint '{path}' not found!")
+        if (
+            checkpoint.get("csv_file") != os.path.abspath(csv_file)
+            or checkpoint.get("model") != model._meta.label
+        ):
+            raise CommandError(
+                f"Checkpoint '{path}' was saved for another file or model!"
+            )
+        return checkpoint
+
+    @staticmethod
+    def save_checkpoint(path: str, checkpoint: dict) -> None:
+        # Запись через временный файл: прерванная запись не портит
+        # предыдущую контрольную точку
+        with open(f"{path}.tmp", "w") as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(f"{path}.tmp", path)
+
+    def field_names(self, model: Model, header: list[str]) -> list[str]:
+        """Field names of the csv columns, `attname` for foreign keys."""
+        related_fields = self.get_related_fields(model)
+        return [
+            f"{name}_id" if name in related_fields else name for name in header
+        ]
+
+    def resume(
+        self,
+        records: CsvRecordReader,
+        checkpoint_path: str,
+        csv_path: str,
+        model: Model,
+        header: list[str],
+        verbosity: int = 1,
+    ) -> dict:
+        """Moves `records` past the rows committed before the checkpoint."""
+        checkpoint = self.load_checkpoint(checkpoint_path, csv_path, model)
+        if checkpoint["header"] != header:
+            raise CommandError(
+                f"Header of '{csv_path}' differs from the checkpoint!"
+            )
+        records.seek(checkpoint["offset"], checkpoint["row"] + 1)
+        if verbosity > 0:
+            self.stdout.write(f"Resuming after row {checkpoint['row']}.")
+        return checkpoint
+
+    def import_bulk(
+        self,
+        model: Model,
+        records: CsvRecordReader,
+        field_names: list[str],
+        progress: ImportProgress,
+        checkpoint: dict,
+        checkpoint_path: str,
+        options: dict,
+    ) -> None:
+        """Imports the records in --bulk mode, saving checkpoints."""
+        rows = (dict(zip(field_names, row)) for row in records)
+        if options["prune"]:
+            rows, keep_ids = self.tracking_ids(model, rows)
+
+        def on_chunk(stats):
+            row = records.records - 1
+            checkpoint.update(offset=records.offset, row=row)
+            self.save_checkpoint(checkpoint_path, checkpoint)
+            if options["verbosity"] > 0:
+                progress.update(row, stats["failed"], records.offset)
+
+        stats = self.bulk_import(
+            model=model,
+            rows=rows,
+            field_names=field_names,
+            chunk_size=options["chunk_size"],
+            verbosity=options["verbosity"],
+            diff=options["diff"],
+            on_chunk=on_chunk,
+        )
+        deleted = 0
+        if options["prune"]:
+            deleted = self.prune(
+                model, keep_ids, options["chunk_size"], options["verbosity"]
+            )
+        # Импорт завершён: продолжать больше нечего
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        if options["verbosity"] > 0:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Created {stats['created']}, updated "
+                    f"{stats['updated']}, unchanged "
+                    f"{stats['unchanged']}, deleted {deleted}, "
+                    f"failed {stats['failed']} {model.__name__} rows."
+                )
+            )
+
+    def import_rows(
+        self,
+        model: Model,
+        records: CsvRecordReader,
+        field_names: list[str],
+        progress: ImportProgress,
+        verbosity: int = 1,
+    ) -> None:
+        """Imports the records one by one with update_or_create()."""
+        failed = 0
+        for row in records:
+            action = self.update_or_create(
+                model=model,
+                fields=dict(zip(field_names, row)),
+                verbosity=verbosity,
+            )
+            failed += action is None
+            if verbosity > 0:
+                progress.update(records.records - 1, failed, records.offset)
 
     def handle(self, *args, **options):
+        if options["prune"] and not options["diff"]:
+            raise CommandError("--prune can be used only with --diff")
+        bulk = options["bulk"] or options["diff"]
+        if options["resume"] and (not bulk or options["prune"]):
+            raise CommandError(
+                "--resume can be used only with --bulk or --diff, "
+                "without --prune"
+            )
 
         model = self.get_model(
             module_name=APP_MODELS,
             model_name=options["model_name"],
             verbosity=options["verbosity"],
         )
+        csv_path = options["csv_file"]
+        checkpoint_path = options["checkpoint"] or f"{csv_path}.checkpoint"
 
-        related_fields = self.get_related_fields(model)
+        with open_binary(csv_path) as csv_file:
+            records = CsvRecordReader(csv_file)
+            # Получаем имена полей из первой строчки csv-файла
+            header = next(records)
+            field_names = self.field_names(model, header)
 
-        with open(options.get("csv_file")) as csv_file:
-            csv_reader = reader(csv_file)
+            checkpoint = {}
+            if options["resume"]:
+                checkpoint = self.resume(
+                    records,
+                    checkpoint_path,
+                    csv_path,
+                    model,
+                    header,
+                    options["verbosity"],
+                )
+            progress = ImportProgress(
+                self.stdout,
+                interval=options["progress_interval"],
+                # Для сжатых файлов размер данных заранее не известен
+                total_bytes=(
+                    None
+                    if csv_path.endswith(".gz")
+                    else os.path.getsize(csv_path)
+                ),
+                start_bytes=records.offset,
+                start_rows=records.records - 1,
+            )
 
-            # Получаем имена полей из первой строчки csv-файла
-            field_names: list[str] = list()
-            first_row = csv_reader.__next__()
-            for field_name in first_row:
-                if field_name in related_fields:
-                    field_name += "_id"
-                field_names.append(field_name)
-
-            for row in csv_reader:
-                fields = dict(zip(field_names, row))
-                self.update_or_create(
-                    model=model,
-                    fields=fields,
-                    verbosity=options["verbosity"],
+            if not bulk:
+                self.import_rows(
+                    model, records, field_names, progress, options["verbosity"]
                 )
+                return
+            checkpoint.update(
+                csv_file=os.path.abspath(csv_path),
+                model=model._meta.label,
+                header=header,
+            )
+            self.import_bulk(
+                model,
+                records,
+                field_names,
+                progress,
+                checkpoint,
+                checkpoint_path,
+                options,
+            )
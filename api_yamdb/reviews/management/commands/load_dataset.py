@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Model
+from reviews.dataset import DATASET_FILES, load_order, parse_file
+
+from .import_csv import Command as ImportCommand
+
+
+class Command(BaseCommand):
+    help = "Load all csv files of the dataset in dependency order"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "data_dir",
+            type=str,
+            nargs="?",
+            default=os.path.join(settings.BASE_DIR, "static", "data"),
+            help="directory with the dataset csv files",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="processes parsing the files, CPU count by default",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="rows per transaction",
+        )
+
+    def find_files(self, data_dir: str, verbosity: int = 1) -> dict:
+        """Paths of the dataset files by model, `.csv.gz` if not `.csv`."""
+        paths = {}
+        for file_name, model_label in DATASET_FILES.items():
+            path = os.path.join(data_dir, file_name)
+            for candidate in (path, f"{path}.gz"):
+                if os.path.exists(candidate):
+                    paths[apps.get_model(model_label)] = candidate
+                    break
+            else:
+                if verbosity > 1:
+                    self.stdout.write(f"'{path}' not found, skipped.")
+        if not paths:
+            raise CommandError(f"No dataset files found in '{data_dir}'!")
+        return paths
+
+    def report(
+        self,
+        model: Model,
+        path: str,
+        errors: list[tuple[int, str]],
+        stats: dict[str, int],
+    ) -> None:
+        """Prints parsing errors and import results of a file."""
+        for line, message in errors:
+            self.stdout.write(self.style.ERROR(f"{path}:{line}: {message}"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {stats['created']}, updated {stats['updated']}, "
+                f"failed {stats['failed'] + len(errors)} "
+                f"{model.__name__} rows."
+            )
+        )
+
+    def handle(self, *args, **options):
+        verbosity = options["verbosity"]
+        paths = self.find_files(options["data_dir"], verbosity)
+
+        importer = ImportCommand()
+        importer.stdout = self.stdout
+        importer.style = self.style
+
+        # Файлы разбираются параллельно, а загружаются по порядку
+        # зависимостей: модель загружается, как только разобран её файл
+        # и загружены модели, на которые она ссылается
+        with ProcessPoolExecutor(
+            max_workers=options["workers"], initializer=django.setup
+        ) as executor:
+            parsed = {
+                model: executor.submit(parse_file, path, model._meta.label)
+                for model, path in paths.items()
+            }
+            for model in load_order(list(paths)):
+                try:
+                    field_names, rows, errors = parsed[model].result()
+                except ValueError as e:
+                    raise CommandError(f"{paths[model]}: {e}")
+                stats = importer.bulk_import(
+                    model=model,
+                    rows=rows,
+                    field_names=field_names,
+                    chunk_size=options["chunk_size"],
+                    verbosity=verbosity,
+                )
+                if verbosity > 0:
+                    self.report(model, paths[model], errors, stats)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews import counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild denormalized counters from the source tables"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            titles = counters.rebuild_ratings()
+            counters.rebuild_weighted_ratings()
+            reviews = counters.rebuild_comments_counts()
+            histograms = counters.rebuild_histograms()
+
+        if options["verbosity"] > 0:
+            self.stdout.write(
+                self.style.SUCCESS(f"Ratings rebuilt for {titles} titles.")
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Comments counts rebuilt for {reviews} reviews."
+                )
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Score histograms rebuilt for {histograms} titles."
+                )
+            )
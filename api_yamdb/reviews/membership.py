@@ -0,0 +1,241 @@
+"""In-process inverted index of titles by genre and category.
+
+For every genre and category the index keeps a bitmap (a Python int with
+bit N set for the title with id N), so multi-facet filters are resolved
+with in-memory unions and intersections instead of joins.
+
+The index is warm while the data versions of the indexed models (see
+`reviews.versions`) are the ones it was built or incrementally updated
+at. A write seen by the process is applied to the index together with
+the version bump once its transaction commits; a write made elsewhere
+shows up as an unexpected version, makes the index cold and it is
+rebuilt on the next lookup. This only holds if the versions live in a
+cache shared by all processes, so with a per-process cache the index is
+not used. Neither is it used for filters matching more than
+`TITLE_MEMBERSHIP_INDEX["MAX_IDS"]` titles, which the database joins
+faster than it filters by a list of ids.
+"""
+
+import json
+import sys
+import threading
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import connections
+
+from .models import Category, Genre, GenreTitle, Title
+from .versions import get_versions, is_shared
+
+
+def bitmap_from_ids(ids: Iterable[int]) -> int:
+    bits = bytearray()
+    for pk in ids:
+        byte = pk >> 3
+        if byte >= len(bits):
+            bits.extend(bytes(byte - len(bits) + 1))
+        bits[byte] |= 1 << (pk & 7)
+    return int.from_bytes(bits, "little")
+
+
+def ids_from_bitmap(bitmap: int) -> list[int]:
+    """Returns ids of the set bits in ascending order.
+
+    The bitmap is scanned by 64-bit words and only the set bits of
+    non-zero words are walked, so sparse bitmaps of large ids are cheap.
+    """
+    size = (bitmap.bit_length() + 63) // 64 * 8
+    words = memoryview(bitmap.to_bytes(size, sys.byteorder)).cast("Q")
+    ids = []
+    for index, word in enumerate(words):
+        while word:
+            low = word & -word
+            ids.append(index * 64 + low.bit_length() - 1)
+            word ^= low
+    return ids
+
+
+def filter_by_ids(queryset, ids: list[int]):
+    """Filters `queryset` by primary keys.
+
+    SQLite limits the number of query parameters, so there the ids are
+    passed as a single JSON array parameter.
+    """
+    if connections[queryset.db].vendor != "sqlite":
+        return queryset.filter(pk__in=ids)
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        where=[f"{table}.id IN (SELECT value FROM json_each(%s))"],
+        params=[json.dumps(ids)],
+    )
+
+
+class TitleMembershipIndex:
+    models = (Title, GenreTitle, Genre, Category)
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._versions = None
+
+    def rebuild(self) -> None:
+        with self._lock:
+            # Версии берутся до чтения данных: запись во время перестроения
+            # сделает индекс холодным, а не оставит его устаревшим
+            versions = list(get_versions(*self.models))
+            self.genre_ids = dict(Genre.objects.values_list("slug", "id"))
+            self.category_ids = dict(
+                Category.objects.values_list("slug", "id")
+            )
+            self.genre_bitmaps = self._bitmaps(
+                GenreTitle.objects.values_list("genre_id", "title_id")
+            )
+            self.category_bitmaps = self._bitmaps(
+                Title.objects.filter(category__isnull=False).values_list(
+                    "category_id", "id"
+                )
+            )
+            self._versions = versions
+
+    @staticmethod
+    def _bitmaps(pairs) -> dict[int, int]:
+        members = {}
+        for key, pk in pairs.order_by().iterator():
+            members.setdefault(key, []).append(pk)
+        return {key: bitmap_from_ids(ids) for key, ids in members.items()}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._versions = None
+
+    def is_warm(self) -> bool:
+        return self._versions is not None and self._versions == list(
+            get_versions(*self.models)
+        )
+
+    def title_ids(
+        self,
+        genres: Optional[list[str]] = None,
+        categories: Optional[list[str]] = None,
+    ) -> Optional[list[int]]:
+        """Returns ids of titles having any of `genres` and `categories`.
+
+        Returns None if no genres and no categories are specified or the
+        index can't be used, the caller filters with joins then.
+        """
+        if not genres and not categories:
+            return None
+        if not is_shared():
+            # Записи других процессов не меняют версии в локальном кэше:
+            # индекс оставался бы тёплым и устаревшим
+            return None
+        with self._lock:
+            if not self.is_warm():
+                self.rebuild()
+            bitmap = None
+            if genres:
+                bitmap = self._union(
+                    self.genre_bitmaps, self.genre_ids, genres
+                )
+            if categories:
+                members = self._union(
+                    self.category_bitmaps, self.category_ids, categories
+                )
+                bitmap = members if bitmap is None else bitmap & members
+        if bin(bitmap).count("1") > settings.TITLE_MEMBERSHIP_INDEX["MAX_IDS"]:
+            return None
+        return ids_from_bitmap(bitmap)
+
+    @staticmethod
+    def _union(bitmaps, ids, slugs) -> int:
+        bitmap = 0
+        for slug in slugs:
+            bitmap |= bitmaps.get(ids.get(slug), 0)
+        return bitmap
+
+    def _advance(self, model, version) -> bool:
+        """Accepts the next version of `model` if it follows the known one."""
+        if self._versions is None:
+            return False
+        position = self.models.index(model)
+        if self._versions[position] + 1 != version:
+            self._versions = None
+            return False
+        self._versions[position] = version
+        return True
+
+    @staticmethod
+    def _set(bitmaps, key, pk, present=True) -> None:
+        bit = 1 << pk
+        bitmap = bitmaps.get(key, 0)
+        bitmaps[key] = bitmap | bit if present else bitmap & ~bit
+
+    def apply(self, model, version, instance, created=False, deleted=False):
+        """Applies a saved or deleted instance of an indexed model."""
+        if model not in self.models:
+            return
+        with self._lock:
+            if not self._advance(model, version):
+                return
+            if model is Title:
+                self._apply_title(instance, deleted)
+            elif model is GenreTitle:
+                self._apply_genre_title(instance, created, deleted)
+            else:
+                self._apply_slug(model, instance, deleted)
+
+    def _apply_title(self, title, deleted) -> None:
+        for category_id in self.category_bitmaps:
+            self._set(self.category_bitmaps, category_id, title.pk, False)
+        if not deleted and title.category_id is not None:
+            self._set(self.category_bitmaps, title.category_id, title.pk)
+
+    def _apply_genre_title(self, genre_title, created, deleted) -> None:
+        if not created and not deleted:
+            # Прежние жанр и произведение записи неизвестны
+            self._versions = None
+            return
+        self._set(
+            self.genre_bitmaps,
+            genre_title.genre_id,
+            genre_title.title_id,
+            created,
+        )
+
+    def _apply_slug(self, model, instance, deleted) -> None:
+        """Applies a genre or a category."""
+        ids = self.genre_ids if model is Genre else self.category_ids
+        bitmaps = (
+            self.genre_bitmaps if model is Genre else self.category_bitmaps
+        )
+        for slug, pk in list(ids.items()):
+            if pk == instance.pk:
+                del ids[slug]
+        if deleted:
+            bitmaps.pop(instance.pk, None)
+        else:
+            ids[instance.slug] = instance.pk
+
+    def apply_genres(self, version, instance, action, reverse, pk_set):
+        """Applies an `m2m_changed` action of `Title.genre`."""
+        with self._lock:
+            if not self._advance(GenreTitle, version):
+                return
+            present = action == "post_add"
+            if reverse:
+                if action == "post_clear":
+                    self.genre_bitmaps[instance.pk] = 0
+                for title_id in pk_set or ():
+                    self._set(
+                        self.genre_bitmaps, instance.pk, title_id, present
+                    )
+            elif action == "post_clear":
+                for genre_id in self.genre_bitmaps:
+                    self._set(self.genre_bitmaps, genre_id, instance.pk, False)
+            else:
+                for genre_id in pk_set:
+                    self._set(
+                        self.genre_bitmaps, genre_id, instance.pk, present
+                    )
+
+
+title_index = TitleMembershipIndex()
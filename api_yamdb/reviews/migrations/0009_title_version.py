@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0008_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="title",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Версия"
+            ),
+        ),
+    ]
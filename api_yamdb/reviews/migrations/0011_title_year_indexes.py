@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0010_title_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(fields=["year"], name="title_year_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(
+                fields=["category", "year"], name="title_category_year_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0011_title_year_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="review",
+            name="pub_date",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                help_text="Дата и время публикации отзыва (автоматическое поле)",
+                verbose_name="Дата и время публикации отзыва",
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comments_count(apps, schema_editor):
+    Comment = apps.get_model("reviews", "Comment")
+    Review = apps.get_model("reviews", "Review")
+    comments = (
+        Comment.objects.filter(review=OuterRef("pk"))
+        .order_by()
+        .values("review")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Review.objects.update(comments_count=Coalesce(Subquery(comments), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0012_review_pub_date_default"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="comments_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="Количество комментариев",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="comment",
+            name="review",
+            field=models.ForeignKey(
+                help_text="Укажите комментируемый отзыв",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="comments",
+                to="reviews.Review",
+                verbose_name="Отзыв",
+            ),
+        ),
+        migrations.RunPython(fill_comments_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_score_histograms(apps, schema_editor):
+    Review = apps.get_model("reviews", "Review")
+    ScoreHistogram = apps.get_model("reviews", "ScoreHistogram")
+    histograms = {}
+    scores = (
+        Review.objects.order_by()
+        .values_list("title_id", "score")
+        .annotate(total=Count("pk"))
+    )
+    for title_id, score, total in scores.iterator():
+        histogram = histograms.setdefault(
+            title_id, ScoreHistogram(title_id=title_id)
+        )
+        setattr(histogram, f"score_{score}", total)
+    ScoreHistogram.objects.bulk_create(histograms.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0013_review_comments_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScoreHistogram",
+            fields=[
+                (
+                    "title",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="score_histogram",
+                        serialize=False,
+                        to="reviews.Title",
+                        verbose_name="Произведение",
+                    ),
+                ),
+                (
+                    "score_1",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Оценок 1"
+                    ),
+                ),
+                (
+                    "score_2",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Оценок 2"
+                    ),
+                ),
+                (
+                    "score_3",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Оценок 3"
+                    ),
+                ),
+                (
+                    "score_4",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Оценок 4"
+                    ),
+                ),
+                (
+                    "score_5",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Оценок 5"
+                    ),
+                ),
+                (
+                    "score_6",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Оценок 6"
+                    ),
+                ),
+                (
+                    "score_7",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Оценок 7"
+                    ),
+                ),
+                (
+                    "score_8",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Оценок 8"
+                    ),
+                ),
+                (
+                    "score_9",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Оценок 9"
+                    ),
+                ),
+                (
+                    "score_10",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Оценок 10"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Распределение оценок",
+                "verbose_name_plural": "Распределения оценок",
+            },
+        ),
+        migrations.RunPython(fill_score_histograms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:58
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from reviews.search import create_search_index
+
+
+def restore_search_index(apps, schema_editor):
+    # Добавление и удаление столбца пересоздают reviews_title,
+    # а вместе с ней и триггеры полнотекстового индекса
+    create_search_index(schema_editor)
+
+
+def fill_weighted_rating(apps, schema_editor):
+    Title = apps.get_model("reviews", "Title")
+    GenreTitle = apps.get_model("reviews", "GenreTitle")
+    prior_mean = float(settings.LEADERBOARD["PRIOR_MEAN"])
+    min_votes = settings.LEADERBOARD["MIN_VOTES"]
+    Title.objects.filter(rating_count__gt=0).update(
+        weighted_rating=(
+            (min_votes * prior_mean + F("rating_sum"))
+            / (min_votes + F("rating_count"))
+        )
+    )
+    GenreTitle.objects.update(
+        weighted_rating=Subquery(
+            Title.objects.filter(pk=OuterRef("title_id")).values(
+                "weighted_rating"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0015_author_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_search_index),
+        migrations.AddField(
+            model_name="genretitle",
+            name="weighted_rating",
+            field=models.FloatField(
+                editable=False, null=True, verbose_name="Взвешенный рейтинг"
+            ),
+        ),
+        migrations.AddField(
+            model_name="title",
+            name="weighted_rating",
+            field=models.FloatField(
+                editable=False, null=True, verbose_name="Взвешенный рейтинг"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="genretitle",
+            index=models.Index(
+                fields=["genre", "weighted_rating", "title"],
+                name="genretitle_genre_top_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(
+                fields=["category", "weighted_rating", "id"],
+                name="title_category_top_idx",
+            ),
+        ),
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+        migrations.RunPython(fill_weighted_rating, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0016_weighted_rating"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="comment",
+            name="pub_date",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                help_text="Дата и время публикации комментария (автоматическое поле)",
+                verbose_name="Дата и время публикации комментария",
+            ),
+        ),
+    ]
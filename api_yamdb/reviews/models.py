@@ -1,5 +1,6 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 from users.models import User
 
 
@@ -43,6 +44,60 @@ class Genre(models.Model):
         return self.slug
 
 
+class TitleQuerySet(models.QuerySet):
+    def for_read(self):
+        """Returns titles ready to be serialized in a fixed number of queries.
+
+        Category is joined into the main query, genres of the whole page are
+        fetched by one extra query, rating is read from the denormalized
+        counters of the row itself.
+        """
+        return self.select_related("category").prefetch_related("genre")
+
+    def facets(self) -> dict:
+        """Counts titles per category, genre and decade of release.
+
+        Every facet is a single grouped query over the titles of this
+        queryset, regardless of the number of facet values.
+        """
+        titles = self.order_by()
+        categories = (
+            titles.filter(category__isnull=False)
+            .values("category__slug")
+            .annotate(count=models.Count("id", distinct=True))
+            .order_by("category__slug")
+        )
+        genres = (
+            titles.filter(genre__isnull=False)
+            .values("genre__slug")
+            .annotate(count=models.Count("id", distinct=True))
+            .order_by("genre__slug")
+        )
+        decades = {}
+        years = titles.values("year").annotate(
+            count=models.Count("id", distinct=True)
+        )
+        for row in years:
+            decade = row["year"] // 10 * 10
+            decades[decade] = decades.get(decade, 0) + row["count"]
+
+        return {
+            "count": sum(decades.values()),
+            "category": [
+                {"slug": row["category__slug"], "count": row["count"]}
+                for row in categories
+            ],
+            "genre": [
+                {"slug": row["genre__slug"], "count": row["count"]}
+                for row in genres
+            ],
+            "decade": [
+                {"decade": decade, "count": count}
+                for decade, count in sorted(decades.items())
+            ],
+        }
+
+
 class Title(models.Model):
     name = models.TextField(
         verbose_name="Название произведения",
@@ -79,16 +134,54 @@ class Title(models.Model):
         verbose_name="Текст отзыва",
         help_text="Напишите отзыв",
     )
+    # Денормализованные счётчики оценок, поддерживаются сигналами Review
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Сумма оценок",
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество оценок",
+    )
+    # Байесовская оценка для рейтингов лучших произведений (leaderboard)
+    weighted_rating = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name="Взвешенный рейтинг",
+    )
+    # Версия изменений произведения, его жанров и отзывов (для ETag)
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Версия",
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Название произведения"
         verbose_name_plural = "Названия произведений"
+        indexes = [
+            models.Index(fields=["year"], name="title_year_idx"),
+            models.Index(
+                fields=["category", "year"], name="title_category_year_idx"
+            ),
+            models.Index(
+                fields=["category", "weighted_rating", "id"],
+                name="title_category_top_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
-    def get_rating(self):
-        return self.reviews.aggregate(rating=models.Avg("score"))
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
 
 
 class GenreTitle(models.Model):
@@ -102,6 +195,20 @@ class GenreTitle(models.Model):
         on_delete=models.CASCADE,
         verbose_name="Название произведения",
     )
+    # Копия Title.weighted_rating для рейтинга лучших в жанре
+    weighted_rating = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name="Взвешенный рейтинг",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["genre", "weighted_rating", "title"],
+                name="genretitle_genre_top_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.genre} {self.title}"
@@ -112,8 +219,11 @@ class Review(models.Model):
         verbose_name="Текст отзыва",
         help_text="Напишите отзыв",
     )
+    # default вместо auto_now_add: при массовой загрузке отзывов
+    # (bulk_create) сохраняется переданная дата публикации
     pub_date = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name="Дата и время публикации отзыва",
         help_text="Дата и время публикации отзыва (автоматическое поле)",
     )
@@ -139,6 +249,12 @@ class Review(models.Model):
         verbose_name="Произведение",
         help_text="Произведение",
     )
+    # Денормализованный счётчик, поддерживается сигналами Comment
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество комментариев",
+    )
 
     class Meta:
         verbose_name = "Отзыв"
@@ -148,18 +264,75 @@ class Review(models.Model):
                 fields=["author", "title"], name="author_title"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["title", "pub_date", "id"],
+                name="review_title_pub_date_idx",
+            ),
+            models.Index(
+                fields=["author", "pub_date", "id"],
+                name="review_author_pub_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text[:25]
 
 
+class ScoreHistogram(models.Model):
+    """Распределение оценок отзывов произведения.
+
+    Счётчики поддерживаются сигналами Review (reviews.counters), строка
+    создаётся при первом отзыве на произведение.
+    """
+
+    SCORES = range(1, 11)
+
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="score_histogram",
+        verbose_name="Произведение",
+    )
+    score_1 = models.PositiveIntegerField(default=0, verbose_name="Оценок 1")
+    score_2 = models.PositiveIntegerField(default=0, verbose_name="Оценок 2")
+    score_3 = models.PositiveIntegerField(default=0, verbose_name="Оценок 3")
+    score_4 = models.PositiveIntegerField(default=0, verbose_name="Оценок 4")
+    score_5 = models.PositiveIntegerField(default=0, verbose_name="Оценок 5")
+    score_6 = models.PositiveIntegerField(default=0, verbose_name="Оценок 6")
+    score_7 = models.PositiveIntegerField(default=0, verbose_name="Оценок 7")
+    score_8 = models.PositiveIntegerField(default=0, verbose_name="Оценок 8")
+    score_9 = models.PositiveIntegerField(default=0, verbose_name="Оценок 9")
+    score_10 = models.PositiveIntegerField(default=0, verbose_name="Оценок 10")
+
+    class Meta:
+        verbose_name = "Распределение оценок"
+        verbose_name_plural = "Распределения оценок"
+
+    def __str__(self):
+        return f"{self.title_id}: {self.as_dict()}"
+
+    @staticmethod
+    def field_name(score: int) -> str:
+        return f"score_{score}"
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            str(score): getattr(self, self.field_name(score))
+            for score in self.SCORES
+        }
+
+
 class Comment(models.Model):
     text = models.TextField(
         verbose_name="Текст комментария",
         help_text="Напишите комментарий",
     )
+    # default вместо auto_now_add: импорт из csv сохраняет дату публикации
     pub_date = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name="Дата и время публикации комментария",
         help_text="Дата и время публикации комментария (автоматическое поле)",
     )
@@ -173,6 +346,7 @@ class Comment(models.Model):
     review = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
+        related_name="comments",
         verbose_name="Отзыв",
         help_text="Укажите комментируемый отзыв",
     )
@@ -180,6 +354,16 @@ class Comment(models.Model):
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(
+                fields=["review", "pub_date", "id"],
+                name="comment_review_pub_date_idx",
+            ),
+            models.Index(
+                fields=["author", "pub_date", "id"],
+                name="comment_author_pub_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text[:25]
@@ -0,0 +1,88 @@
+"""Full-text search over title name and description.
+
+On SQLite the search is served by an FTS5 table with external content
+(`reviews_title`), kept in sync by triggers. SQLite drops the triggers
+together with the table, so a migration which remakes `reviews_title`
+(e.g. adds a column to `Title`) must call `create_search_index()` again.
+On other databases search falls back to `icontains` lookups.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+SEARCH_TABLE = "reviews_title_fts"
+
+CREATE_SEARCH_INDEX = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "name, description, content='reviews_title', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai "
+    "AFTER INSERT ON reviews_title BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad "
+    "AFTER DELETE ON reviews_title BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au "
+    "AFTER UPDATE OF name, description ON reviews_title BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')",
+)
+
+DROP_SEARCH_INDEX = (
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_au",
+    f"DROP TABLE IF EXISTS {SEARCH_TABLE}",
+)
+
+
+def create_search_index(schema_editor) -> None:
+    """Creates (or restores the triggers of) the index and fills it."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in CREATE_SEARCH_INDEX:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(schema_editor) -> None:
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in DROP_SEARCH_INDEX:
+        schema_editor.execute(statement)
+
+
+def search_titles(queryset, query: str):
+    """Filters titles by words of `query`, matching word prefixes.
+
+    Every word must be found in the name or description. On SQLite the
+    result is ordered by relevance (bm25), best matches first.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return queryset
+
+    if connections[queryset.db].vendor != "sqlite":
+        condition = Q()
+        for term in terms:
+            condition &= Q(name__icontains=term) | Q(
+                description__icontains=term
+            )
+        return queryset.filter(condition)
+
+    match = " ".join(f'"{term}"*' for term in terms)
+    return queryset.extra(
+        select={"search_rank": f"{SEARCH_TABLE}.rank"},
+        tables=[SEARCH_TABLE],
+        where=[
+            f"{SEARCH_TABLE}.rowid = reviews_title.id",
+            f"{SEARCH_TABLE} MATCH %s",
+        ],
+        params=[match],
+    ).order_by("search_rank", "id")
@@ -0,0 +1,205 @@
+import threading
+from collections import Counter
+from copy import copy
+
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from users.models import User
+
+from . import counters, versions
+from .membership import title_index
+from .models import Category, Comment, Genre, GenreTitle, Review, Title
+
+VERSIONED_MODELS = (Category, Genre, GenreTitle, Review, Title)
+
+
+class CascadeState(threading.local):
+    """Objects being deleted with their reviews and comments.
+
+    Django sends pre_delete for every collected object before deleting
+    any of them, so the handlers below learn about a cascade up front:
+    counters of a deleted title or review are not updated row by row, and
+    the decrements of a deleted user's reviews and comments are grouped
+    and applied once the user is deleted.
+    """
+
+    def __init__(self):
+        self.titles = set()
+        self.reviews = set()
+        self.authors = set()
+        self.removed_scores = {}
+        self.removed_comments = Counter()
+
+
+cascade = CascadeState()
+
+
+@receiver(pre_delete, sender=Title)
+def start_title_cascade(sender, instance, **kwargs):
+    cascade.titles.add(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def finish_title_cascade(sender, instance, **kwargs):
+    cascade.titles.discard(instance.pk)
+
+
+@receiver(pre_delete, sender=Review)
+def start_review_cascade(sender, instance, **kwargs):
+    cascade.reviews.add(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def start_author_cascade(sender, instance, **kwargs):
+    cascade.authors.add(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def finish_author_cascade(sender, instance, **kwargs):
+    cascade.authors.discard(instance.pk)
+    for title_id, scores in cascade.removed_scores.items():
+        counters.reviews_removed(title_id, scores)
+    for review_id, count in cascade.removed_comments.items():
+        counters.comment_removed(review_id, count)
+    cascade.removed_scores.clear()
+    cascade.removed_comments.clear()
+
+
+@receiver(post_init, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    # Оценка на момент загрузки нужна, чтобы пересчитать рейтинг при правке
+    instance._loaded_score = instance.score
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, **kwargs):
+    # Оценка могла быть присвоена строкой (например, из csv-файла),
+    # а счётчики считаются в числах
+    score = int(instance.score)
+    if created:
+        counters.review_added(instance.title_id, score)
+    else:
+        counters.review_changed(
+            instance.title_id, instance._loaded_score, score
+        )
+    instance._loaded_score = score
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    cascade.reviews.discard(instance.pk)
+    if instance.title_id in cascade.titles:
+        return
+    if instance.author_id in cascade.authors:
+        cascade.removed_scores.setdefault(instance.title_id, []).append(
+            instance._loaded_score
+        )
+        return
+    counters.review_removed(instance.title_id, instance._loaded_score)
+
+
+@receiver(post_save, sender=Comment)
+def update_comments_count_on_save(sender, instance, created, **kwargs):
+    if created:
+        counters.comment_added(instance.review_id)
+    else:
+        # Текст комментария входит в представление произведения
+        # (?include=comments), его ETag должен измениться
+        counters.touch_titles(reviews=instance.review_id)
+
+
+@receiver(post_delete, sender=Comment)
+def update_comments_count_on_delete(sender, instance, **kwargs):
+    if instance.review_id in cascade.reviews:
+        return
+    if instance.author_id in cascade.authors:
+        cascade.removed_comments[instance.review_id] += 1
+        return
+    counters.comment_removed(instance.review_id)
+
+
+@receiver(post_save, sender=Title)
+def touch_title_on_save(sender, instance, created, **kwargs):
+    if not created:
+        counters.touch_titles(pk=instance.pk)
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def touch_title_on_genre_change(sender, instance, **kwargs):
+    if instance.title_id in cascade.titles:
+        return
+    if kwargs.get("created"):
+        counters.sync_genre_ratings(pk=instance.pk)
+    counters.touch_titles(pk=instance.title_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_titles_of_category(sender, instance, **kwargs):
+    counters.touch_titles(category=instance)
+
+
+@receiver(post_save, sender=Genre)
+def touch_titles_of_genre(sender, instance, created, **kwargs):
+    if not created:
+        counters.touch_titles(genre=instance)
+
+
+def bump_data_version(sender, instance, signal, **kwargs):
+    # Версия и индекс меняются только после фиксации: иначе параллельный
+    # запрос закэширует ещё не зафиксированные данные под новой версией.
+    # Копия сохраняет pk, который delete() обнуляет
+    instance = copy(instance)
+    created = kwargs.get("created", False)
+    deleted = signal is post_delete
+
+    def on_commit():
+        version = versions.bump_version(sender)
+        title_index.apply(
+            sender, version, instance, created=created, deleted=deleted
+        )
+
+    transaction.on_commit(on_commit)
+
+
+# Подписка только на нужные модели: обработчик без sender лишил бы
+# остальные модели быстрого каскадного удаления
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_data_version, sender=model)
+    post_delete.connect(bump_data_version, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def track_title_genres_change(sender, instance, action, reverse, **kwargs):
+    if action == "pre_clear" and reverse:
+        # После очистки жанра его произведения уже не найти
+        counters.touch_titles(genre=instance)
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    pk_set = set(kwargs["pk_set"] or ())
+
+    def on_commit():
+        version = versions.bump_version(GenreTitle)
+        title_index.apply_genres(version, instance, action, reverse, pk_set)
+
+    transaction.on_commit(on_commit)
+    if action == "post_add":
+        # Новые связи получают взвешенный рейтинг произведения
+        if reverse:
+            counters.sync_genre_ratings(
+                genre=instance, title_id__in=kwargs["pk_set"]
+            )
+        else:
+            counters.sync_genre_ratings(title_id=instance.pk)
+    if not reverse:
+        counters.touch_titles(pk=instance.pk)
+    elif kwargs["pk_set"]:
+        counters.touch_titles(pk__in=kwargs["pk_set"])
@@ -0,0 +1,57 @@
+"""Data version counters of reviews models.
+
+Every write to a model bumps its counter, so anything derived from the
+model's data (e.g. cached API responses) can include the current versions
+in its cache key and is never served after the data has changed. Writers
+bump the counter once their transaction commits: a bump made earlier
+would let a concurrent reader cache the old rows under the new version.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE["CACHE_ALIAS"]]
+
+
+def is_shared() -> bool:
+    """Whether the versions are seen by all processes.
+
+    A per-process cache (locmem) misses the bumps made by other server
+    workers and by management commands.
+    """
+    return not isinstance(get_cache(), LocMemCache)
+
+
+def version_key(model) -> str:
+    return f"version:{model._meta.label_lower}"
+
+
+def get_versions(*models) -> tuple[int, ...]:
+    """Returns current data versions of the specified models."""
+    cache = get_cache()
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Счётчик вытеснен из кэша или ещё не создан: начинаем его
+            # с текущего времени, чтобы не совпасть с прежними версиями
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def bump_version(model) -> int:
+    """Increments data version of the model and returns the new value."""
+    cache = get_cache()
+    key = version_key(model)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
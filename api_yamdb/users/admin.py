@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutgoingEmail, User
 
 
 @admin.register(User)
@@ -29,3 +29,20 @@ class UserAdmin(admin.ModelAdmin):
         "email",
     )
     list_display_links = ("id",)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "recipient",
+        "subject",
+        "created_at",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+    )
+    list_filter = ("sent_at",)
+    search_fields = ("recipient",)
+    # Текст письма содержит код подтверждения
+    exclude = ("body",)
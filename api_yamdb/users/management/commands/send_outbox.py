@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from users.outbox import send_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued e-mails from the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="e-mails sent over one connection",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="keep running as a worker, polling the outbox",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="seconds between polls in --loop mode",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_outbox(options["batch_size"])
+            if options["verbosity"] > 0 and (sent or failed):
+                self.stdout.write(self.style.SUCCESS(f"Sent {sent} e-mails."))
+                if failed:
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"Failed {failed} e-mails, will be retried."
+                        )
+                    )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -19,6 +20,11 @@ class User(AbstractUser):
         blank=True,
     )
     role = models.TextField("Роль", choices=role_choices, default=USER)
+    # Увеличивается при смене роли или активности: токены с прежней
+    # версией больше не подтверждают роль (api.tokens)
+    token_version = models.PositiveIntegerField(
+        "Версия токенов", default=0, editable=False
+    )
 
     @property
     def is_user(self):
@@ -31,3 +37,37 @@ class User(AbstractUser):
     @property
     def is_admin(self):
         return self.role == self.ADMIN or self.is_superuser
+
+
+class OutgoingEmail(models.Model):
+    """E-mail queued for delivery by the `send_outbox` command."""
+
+    subject = models.CharField("Тема", max_length=255)
+    body = models.TextField("Текст")
+    from_email = models.CharField("Отправитель", max_length=254)
+    recipient = models.EmailField("Получатель")
+    created_at = models.DateTimeField(
+        "Создано", default=timezone.now, editable=False
+    )
+    attempts = models.PositiveSmallIntegerField(
+        "Попыток отправки", default=0, editable=False
+    )
+    next_attempt_at = models.DateTimeField(
+        "Следующая попытка", default=timezone.now
+    )
+    sent_at = models.DateTimeField("Отправлено", null=True, blank=True)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+
+    class Meta:
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+        indexes = [
+            # Выборка очереди: неотправленные письма, срок которых наступил
+            models.Index(
+                fields=["sent_at", "next_attempt_at"],
+                name="outgoing_email_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
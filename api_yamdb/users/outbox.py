@@ -0,0 +1,149 @@
+"""Transactional outbox for e-mails sent on behalf of users.
+
+Requests only queue an `OutgoingEmail` row, which is cheap and commits
+together with the data the e-mail is about. The `send_outbox` command
+delivers the queue in batches, reusing one backend connection per batch,
+and reschedules failed e-mails with exponential backoff. Bodies may hold
+confirmation codes, so they are erased once the e-mail is sent or gives
+up retrying.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def enqueue_email(subject: str, body: str, recipient: str) -> OutgoingEmail:
+    """Queues an e-mail to `recipient` from `settings.DEFAULT_FROM_EMAIL`."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient=recipient,
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next attempt after `attempts` failed ones."""
+    options = settings.EMAIL_OUTBOX
+    seconds = options["RETRY_DELAY"] * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, options["MAX_RETRY_DELAY"]))
+
+
+def due_emails():
+    """E-mails waiting for delivery whose next attempt is due."""
+    return OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        next_attempt_at__lte=timezone.now(),
+        attempts__lt=settings.EMAIL_OUTBOX["MAX_ATTEMPTS"],
+    ).order_by("next_attempt_at", "id")
+
+
+def claim_batch(batch_size: int) -> list[OutgoingEmail]:
+    """Leases a batch of due e-mails in a short transaction.
+
+    The claim counts as an attempt and moves `next_attempt_at` by the
+    retry delay: other workers skip the batch while it is being sent, and
+    e-mails of a worker that died mid-batch are retried after the delay.
+    """
+    with transaction.atomic():
+        emails = list(
+            due_emails().select_for_update(skip_locked=True)[:batch_size]
+        )
+        now = timezone.now()
+        for email in emails:
+            email.attempts += 1
+            email.next_attempt_at = now + retry_delay(email.attempts)
+        OutgoingEmail.objects.bulk_update(
+            emails, ("attempts", "next_attempt_at")
+        )
+    return emails
+
+
+def deliver(emails: list[OutgoingEmail]) -> tuple[list, list]:
+    """Sends e-mails over a single connection.
+
+    Returns:
+        tuple: sent e-mails and (e-mail, error) pairs of failed ones
+    """
+    try:
+        connection = get_connection()
+        connection.open()
+    except Exception as error:
+        # Без соединения не будет отправлено ни одно письмо пакета
+        return [], [(email, error) for email in emails]
+
+    sent, failed = [], []
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject,
+                email.body,
+                email.from_email,
+                [email.recipient],
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as error:
+                failed.append((email, error))
+            else:
+                sent.append(email)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def send_batch(batch_size: int = None) -> tuple[int, int]:
+    """Delivers one batch of due e-mails over a single connection.
+
+    No transaction is open while the e-mails are sent: the batch is
+    claimed and its results are saved in two short transactions, so
+    slow delivery does not block writers (SQLite locks the whole file).
+
+    Returns:
+        tuple: numbers of sent and failed e-mails
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX["BATCH_SIZE"]
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+    sent, failed = deliver(emails)
+
+    now = timezone.now()
+    for email in sent:
+        email.sent_at = now
+        email.last_error = ""
+        email.body = ""
+    for email, error in failed:
+        email.last_error = f"{type(error).__name__}: {error}"
+        if email.attempts >= settings.EMAIL_OUTBOX["MAX_ATTEMPTS"]:
+            # Письмо больше не будет отправлено
+            email.body = ""
+    OutgoingEmail.objects.bulk_update(
+        emails, ("sent_at", "last_error", "body")
+    )
+    return len(sent), len(failed)
+
+
+def send_outbox(batch_size: int = None) -> tuple[int, int]:
+    """Delivers all due e-mails batch by batch.
+
+    E-mails failed in this run are rescheduled into the future, so every
+    e-mail is tried at most once per run.
+
+    Returns:
+        tuple: numbers of sent and failed e-mails
+    """
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = send_batch(batch_size)
+        if not sent and not failed:
+            return total_sent, total_failed
+        total_sent += sent
+        total_failed += failed
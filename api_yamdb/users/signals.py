@@ -0,0 +1,30 @@
+from django.db.models.signals import post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import User
+
+# Поля, изменение которых делает недействительными роли в выданных токенах
+ACCESS_FIELDS = ("role", "is_active", "is_superuser")
+
+
+def access_fields(user):
+    return tuple(getattr(user, name) for name in ACCESS_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_access_fields(sender, instance, **kwargs):
+    # Значения на момент загрузки нужны, чтобы заметить смену роли
+    instance._loaded_access = access_fields(instance)
+
+
+@receiver(pre_save, sender=User)
+def bump_token_version(sender, instance, **kwargs):
+    if instance._state.adding:
+        return
+    if access_fields(instance) != instance._loaded_access:
+        instance.token_version += 1
+
+
+@receiver(post_save, sender=User)
+def reset_access_fields(sender, instance, **kwargs):
+    instance._loaded_access = access_fields(instance)
@@ -0,0 +1,96 @@
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+class Test08RatingCounters:
+
+    @staticmethod
+    def get_title(title_id):
+        from reviews.models import Title
+        return Title.objects.get(id=title_id)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_counters_follow_reviews(self, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что при создании отзыва обновляются счётчики рейтинга произведения'
+        )
+
+        client_user = auth_client(user)
+        client_user.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/', data={'score': 9}
+        )
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (18, 3), (
+            'Проверьте, что при изменении оценки отзыва пересчитывается сумма оценок'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/')
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (13, 2), (
+            'Проверьте, что при удалении отзыва обновляются счётчики рейтинга'
+        )
+
+        moderator.delete()
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (9, 1), (
+            'Проверьте, что при каскадном удалении отзывов обновляются счётчики рейтинга'
+        )
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('rating') == 9
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild_counters(self, admin_client, admin):
+        from reviews.models import Title
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        call_command('rebuild_counters', verbosity=0)
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что команда `rebuild_counters` пересчитывает счётчики рейтинга'
+        )
+        title = self.get_title(titles[1]['id'])
+        assert (title.rating_sum, title.rating_count) == (0, 0)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_string_score(self, admin_client, admin):
+        from reviews.models import Review
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        review = Review.objects.get(pk=reviews[0]['id'])
+        review.score = '10'
+        review.save()
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (17, 3), (
+            'Проверьте, что счётчики рейтинга пересчитываются при оценке, присвоенной строкой'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_cascades(self, django_user_model, django_assert_max_num_queries):
+        from reviews.models import Comment, Review, ScoreHistogram, Title
+        titles = [Title.objects.create(name=f'Т{i}', year=2000) for i in range(2)]
+        users = [
+            django_user_model.objects.create(username=f'u{i}', email=f'u{i}@yamdb.fake') for i in range(20)
+        ]
+        for user in users:
+            for title in titles:
+                review = Review.objects.create(title=title, author=user, text='Отзыв', score=5)
+                Comment.objects.create(review=review, author=users[0], text='Комментарий')
+
+        users[1].delete()
+        title = self.get_title(titles[0].pk)
+        assert (title.rating_sum, title.rating_count) == (95, 19)
+        users[0].delete()
+        title = self.get_title(titles[0].pk)
+        assert (title.rating_sum, title.rating_count) == (90, 18), (
+            'Проверьте, что при удалении пользователя счётчики уменьшаются на его отзывы'
+        )
+        review = Review.objects.filter(title=titles[1]).first()
+        assert review.comments_count == 0
+        assert ScoreHistogram.objects.get(title=titles[1]).score_5 == 18
+
+        with django_assert_max_num_queries(12):
+            titles[0].delete()
+        assert self.get_title(titles[1].pk).rating_count == 18
@@ -0,0 +1,30 @@
+import pytest
+
+from .common import create_catalogue
+
+
+class Test09TitleQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('size', [10, 500])
+    def test_01_list_query_count(self, client, django_assert_num_queries, size):
+        create_catalogue(size)
+        # COUNT, страница произведений с категорией, жанры страницы
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/?limit={size}')
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == size
+        assert len(results[0]['genre']) == 2, (
+            'Проверьте, что при GET запросе `/api/v1/titles/` возвращаются жанры произведения'
+        )
+        assert results[0]['category']['slug'] == 'movie'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_detail_query_count(self, client, django_assert_num_queries):
+        titles = create_catalogue(3)
+        # версия для ETag, произведение с категорией, жанры
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/{titles[0].pk}/')
+        assert response.status_code == 200
+        assert len(response.json()['genre']) == 2
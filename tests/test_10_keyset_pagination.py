@@ -0,0 +1,86 @@
+import pytest
+
+from .common import create_catalogue, create_comments
+
+
+class Test10KeysetPagination:
+
+    @staticmethod
+    def walk(client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме `cursor` не выполняется подсчёт `count`'
+            )
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        return ids
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cursor(self, client):
+        titles = create_catalogue(25)
+        ids = self.walk(client, '/api/v1/titles/?cursor=&limit=10')
+        assert ids == sorted(title.pk for title in titles), (
+            'Проверьте, что при GET запросе `/api/v1/titles/?cursor=` '
+            'возвращаются все произведения по порядку `id`'
+        )
+        response = client.get('/api/v1/titles/?limit=10&offset=20')
+        data = response.json()
+        assert data['count'] == 25 and len(data['results']) == 5, (
+            'Проверьте, что пагинация `limit`/`offset` продолжает работать'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_and_comments_cursor(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        ids = self.walk(client, f'/api/v1/titles/{titles[0]["id"]}/reviews/?cursor=&limit=2')
+        assert ids == sorted((review['id'] for review in reviews), reverse=True), (
+            'Проверьте, что отзывы в режиме `cursor` отсортированы от новых к старым'
+        )
+        ids = self.walk(
+            client,
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/?cursor=&limit=1'
+        )
+        assert ids == sorted((comment['id'] for comment in comments), reverse=True)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_equal_pub_dates(self, client, admin_client, admin):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.utils import timezone
+        from reviews.models import Comment
+
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        Comment.objects.bulk_create(
+            Comment(review_id=reviews[0]['id'], author=admin, text=f'Комментарий {i}')
+            for i in range(30)
+        )
+        Comment.objects.update(pub_date=timezone.now())
+        expected = list(
+            Comment.objects.filter(review_id=reviews[0]['id'])
+            .order_by('-id').values_list('id', flat=True)
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        with CaptureQueriesContext(connection) as context:
+            ids = self.walk(client, f'{url}?cursor=&limit=7')
+        assert ids == expected, (
+            'Проверьте, что курсор учитывает `id` при одинаковой `pub_date`'
+        )
+        assert not [
+            query for query in context.captured_queries if 'OFFSET' in query['sql']
+        ], 'Проверьте, что страницы курсора выбираются без OFFSET'
+
+        response = client.get(f'{url}?cursor=&limit=7')
+        response = client.get(response.json()['next'])
+        previous = client.get(response.json()['previous']).json()
+        assert [item['id'] for item in previous['results']] == expected[:7]
+        assert previous['previous'] is None
+
+        feed = [comment for comment in expected if Comment.objects.get(pk=comment).author == admin]
+        assert self.walk(client, f'/api/v1/users/{admin.username}/comments/?limit=4') == feed, (
+            'Проверьте, что ленты автора листаются по (`pub_date`, `id`)'
+        )
+        assert client.get(f'{url}?cursor=invalid').status_code == 404
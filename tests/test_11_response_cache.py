@@ -0,0 +1,77 @@
+import pytest
+
+from .common import create_catalogue, create_categories
+
+
+@pytest.mark.usefixtures('shared_cache')
+class Test11ResponseCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_anonymous_list_cached(self, client, django_assert_num_queries):
+        create_catalogue(3)
+        first = client.get('/api/v1/titles/?offset=0&limit=2')
+        with django_assert_num_queries(0):
+            second = client.get('/api/v1/titles/?limit=2&offset=0')
+        assert second.json() == first.json(), (
+            'Проверьте, что повторный анонимный запрос списка обслуживается из кэша'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalidated_on_write(self, client, admin_client):
+        titles = create_catalogue(3)
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/categories/')
+        admin_client.patch(f'/api/v1/titles/{titles[0].pk}/', data={'name': 'Новое имя'})
+        create_categories(admin_client)
+
+        names = [title['name'] for title in client.get('/api/v1/titles/').json()['results']]
+        assert 'Новое имя' in names, (
+            'Проверьте, что после изменения произведения кэш списка не отдаёт устаревшие данные'
+        )
+        assert client.get('/api/v1/categories/').json()['count'] == 3, (
+            'Проверьте, что после создания категории кэш списка категорий сбрасывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_authenticated_not_cached(self, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        create_catalogue(3)
+        admin_client.get('/api/v1/genres/')
+        with CaptureQueriesContext(connection) as context:
+            admin_client.get('/api/v1/genres/')
+        assert any('reviews_genre' in query['sql'] for query in context.captured_queries), (
+            'Проверьте, что ответы авторизованным пользователям не кэшируются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_version_bumped_on_commit(self):
+        from django.db import transaction
+        from reviews.models import Title
+        from reviews.versions import get_versions
+
+        title = create_catalogue(1)[0]
+        version = get_versions(Title)
+        with transaction.atomic():
+            title.name = 'Новое имя'
+            title.save()
+            assert get_versions(Title) == version, (
+                'Проверьте, что версия данных меняется только после фиксации транзакции'
+            )
+        assert get_versions(Title) != version
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_not_cached_in_locmem(self, client, settings):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        create_catalogue(3)
+        client.get('/api/v1/genres/')
+        with CaptureQueriesContext(connection) as context:
+            client.get('/api/v1/genres/')
+        assert any('reviews_genre' in query['sql'] for query in context.captured_queries), (
+            'Проверьте, что с кэшем locmem ответы не кэшируются: '
+            'он не видит изменений из других процессов'
+        )
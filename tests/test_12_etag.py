@@ -0,0 +1,55 @@
+import pytest
+
+from .common import auth_client, create_reviews
+
+
+class Test12ETag:
+
+    @staticmethod
+    def assert_not_modified(client, url, etag):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            f'Проверьте, что GET запрос `{url}` с актуальным `If-None-Match` возвращает статус 304'
+        )
+
+    @staticmethod
+    def assert_modified(client, url, etag):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            f'Проверьте, что после изменения данных GET запрос `{url}` возвращает статус 200'
+        )
+        assert response['ETag'] != etag
+        return response['ETag']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_detail(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = client.get(url)['ETag']
+        self.assert_not_modified(client, url, etag)
+
+        auth_client(user).patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/', data={'score': 10}
+        )
+        etag = self.assert_modified(client, url, etag)
+        assert client.get(url).json()['rating'] == 19 / 3
+
+        admin_client.patch(url, data={'genre': ['drama']})
+        etag = self.assert_modified(client, url, etag)
+        self.assert_not_modified(client, url, etag)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review_list(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        self.assert_not_modified(client, url, etag)
+        assert client.get(f'{url}?limit=1', HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что ETag учитывает параметры запроса'
+        )
+
+        admin_client.patch(f'{url}{reviews[0]["id"]}/', data={'text': 'Новый текст'})
+        etag = self.assert_modified(client, url, etag)
+
+        admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        self.assert_modified(client, url, etag)
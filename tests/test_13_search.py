@@ -0,0 +1,43 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test13TitleSearch:
+
+    @staticmethod
+    def search(client, query):
+        response = client.get('/api/v1/titles/', {'search': query})
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.search(client, 'драм') == ['Проект'], (
+            'Проверьте, что параметр `search` ищет по началу слова в описании произведения'
+        )
+        assert self.search(client, 'ПОВОРОТ') == ['Поворот туда'], (
+            'Проверьте, что параметр `search` ищет по названию без учёта регистра'
+        )
+        assert self.search(client, 'поворот драма') == []
+        assert len(self.search(client, '')) == 2
+
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'description': 'Драма'})
+        assert self.search(client, 'пике') == [], (
+            'Проверьте, что поисковый индекс обновляется при изменении произведения'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert self.search(client, 'драма') == ['Поворот туда'], (
+            'Проверьте, что поисковый индекс обновляется при удалении произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ranking(self, client, admin_client):
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Драма драма драма', 'year': 2001, 'genre': ['drama'], 'category': 'films',
+        })
+        assert self.search(client, 'драма') == ['Драма драма драма', 'Проект'], (
+            'Проверьте, что результаты поиска упорядочены по релевантности'
+        )
@@ -0,0 +1,59 @@
+import pytest
+
+from .common import create_catalogue
+
+
+def query_plan(queryset):
+    from django.db import connection
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return ' '.join(str(row[-1]) for row in cursor.fetchall())
+
+
+class Test14YearFilter:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_year_filters(self, client):
+        from reviews.models import Title
+
+        titles = create_catalogue(30)
+        for i, title in enumerate(titles):
+            Title.objects.filter(pk=title.pk).update(year=1980 + i)
+
+        def years(query):
+            response = client.get(f'/api/v1/titles/?limit=100&{query}')
+            assert response.status_code == 200
+            return sorted(title['year'] for title in response.json()['results'])
+
+        assert years('year=1990') == [1990], (
+            'Проверьте, что фильтр `year` ищет точное совпадение года'
+        )
+        assert years('year_min=2005') == list(range(2005, 2010))
+        assert years('year_min=1985&year_max=1987') == [1985, 1986, 1987]
+        assert years('decade=1990') == list(range(1990, 2000)), (
+            'Проверьте, что фильтр `decade` возвращает произведения десятилетия'
+        )
+        assert years('decade=1995') == list(range(1990, 2000))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_year_filter_plan(self, settings):
+        """Фильтры по году используют B-tree индексы."""
+        settings.TITLE_MEMBERSHIP_INDEX = dict(settings.TITLE_MEMBERSHIP_INDEX, ENABLED=False)
+        from api.filters import CategoryGenreFilter
+        from reviews.models import Title
+
+        create_catalogue(2000)
+        cases = {
+            'year': ({'year': '1999'}, 'title_year_idx'),
+            'range': ({'year_min': '1990', 'year_max': '1999'}, 'title_year_idx'),
+            'decade': ({'decade': '1990'}, 'title_year_idx'),
+            'category': ({'category': 'movie', 'decade': '1990'}, 'title_category_year_idx'),
+        }
+        for case, (params, index) in cases.items():
+            queryset = CategoryGenreFilter(params, queryset=Title.objects.all()).qs
+            plan = query_plan(queryset)
+            assert index in plan, (
+                f'Проверьте, что фильтр `{case}` использует индекс `{index}`: {plan}'
+            )
@@ -0,0 +1,97 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test15MembershipIndex:
+
+    @pytest.fixture(autouse=True)
+    def enable_index(self, settings, shared_cache):
+        # Индекс работает только с общим для процессов кэшем версий
+        settings.TITLE_MEMBERSHIP_INDEX = dict(settings.TITLE_MEMBERSHIP_INDEX, ENABLED=True)
+
+    @staticmethod
+    def names(client, query):
+        response = client.get(f'/api/v1/titles/?{query}')
+        assert response.status_code == 200
+        return sorted(title['name'] for title in response.json()['results'])
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('use_index', [True, False])
+    def test_01_filters(self, admin_client, settings, use_index):
+        settings.TITLE_MEMBERSHIP_INDEX = dict(settings.TITLE_MEMBERSHIP_INDEX, ENABLED=use_index)
+        create_titles(admin_client)
+        assert self.names(admin_client, 'genre=horror,comedy') == ['Поворот туда'], (
+            'Проверьте, что фильтр по нескольким жанрам не возвращает дубликаты'
+        )
+        assert self.names(admin_client, 'genre=drama,comedy') == ['Поворот туда', 'Проект']
+        assert self.names(admin_client, 'genre=drama&category=books') == ['Проект']
+        assert self.names(admin_client, 'genre=drama&category=films') == []
+        assert self.names(admin_client, 'genre=unknown') == []
+        assert self.names(admin_client, 'category=films,books&year=2020') == ['Проект']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_incremental_update(self, admin_client):
+        from reviews.membership import title_index
+
+        titles, _, _ = create_titles(admin_client)
+        assert self.names(admin_client, 'genre=drama') == ['Проект']
+        assert title_index.is_warm()
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'genre': ['drama'], 'category': 'books'}
+        )
+        admin_client.post('/api/v1/genres/', data={'name': 'Триллер', 'slug': 'thriller'})
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Новинка', 'year': 2021, 'genre': ['thriller'], 'category': 'films'
+        })
+        assert title_index.is_warm(), (
+            'Проверьте, что индекс обновляется инкрементально при записи через API'
+        )
+        assert self.names(admin_client, 'genre=drama&category=books') == ['Поворот туда', 'Проект']
+        assert self.names(admin_client, 'genre=comedy') == []
+        assert self.names(admin_client, 'genre=thriller&category=films') == ['Новинка']
+
+        admin_client.delete('/api/v1/categories/books/')
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert self.names(admin_client, 'genre=drama') == ['Поворот туда']
+        assert self.names(admin_client, 'category=books') == []
+        assert title_index.is_warm()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rollback(self, admin_client):
+        from django.db import transaction
+        from reviews.membership import title_index
+        from reviews.models import Genre, Title
+
+        titles, _, _ = create_titles(admin_client)
+        assert self.names(admin_client, 'genre=drama') == ['Проект']
+        title = Title.objects.get(pk=titles[0]['id'])
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                title.genre.add(Genre.objects.get(slug='drama'))
+                raise RuntimeError
+        assert title_index.is_warm()
+        assert self.names(admin_client, 'genre=drama') == ['Проект'], (
+            'Проверьте, что отменённая транзакция не меняет индекс'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_fallback_to_joins(self, admin_client, settings):
+        from reviews.membership import ids_from_bitmap, title_index
+
+        assert ids_from_bitmap(1 << 2_000_000 | 1 << 130 | 1 << 3) == [3, 130, 2_000_000]
+        create_titles(admin_client)
+        assert title_index.title_ids(genres=['drama']) is not None
+        settings.TITLE_MEMBERSHIP_INDEX = dict(settings.TITLE_MEMBERSHIP_INDEX, MAX_IDS=0)
+        assert title_index.title_ids(genres=['drama']) is None, (
+            'Проверьте, что при большом числе совпадений индекс не используется'
+        )
+        assert self.names(admin_client, 'genre=drama') == ['Проект']
+
+        settings.TITLE_MEMBERSHIP_INDEX = dict(settings.TITLE_MEMBERSHIP_INDEX, MAX_IDS=10000)
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        assert title_index.title_ids(genres=['drama']) is None, (
+            'Проверьте, что индекс не используется с кэшем версий отдельного процесса'
+        )
+        assert self.names(admin_client, 'genre=drama') == ['Проект']
@@ -0,0 +1,38 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test16Facets:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_facets(self, client, admin_client, django_assert_max_num_queries):
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Чудо юдо', 'year': 2024, 'genre': ['drama', 'comedy'], 'category': 'films'
+        })
+        with django_assert_max_num_queries(3):
+            response = client.get('/api/v1/titles/facets/')
+        assert response.status_code == 200, (
+            'Проверьте, что GET запрос `/api/v1/titles/facets/` возвращает статус 200'
+        )
+        assert response.json() == {
+            'count': 3,
+            'category': [{'slug': 'books', 'count': 1}, {'slug': 'films', 'count': 2}],
+            'genre': [
+                {'slug': 'comedy', 'count': 2},
+                {'slug': 'drama', 'count': 2},
+                {'slug': 'horror', 'count': 1},
+            ],
+            'decade': [{'decade': 2000, 'count': 1}, {'decade': 2020, 'count': 2}],
+        }
+
+        response = client.get('/api/v1/titles/facets/?genre=drama,comedy&search=чудо')
+        assert response.json() == {
+            'count': 1,
+            'category': [{'slug': 'films', 'count': 1}],
+            'genre': [{'slug': 'comedy', 'count': 1}, {'slug': 'drama', 'count': 1}],
+            'decade': [{'decade': 2020, 'count': 1}],
+        }, (
+            'Проверьте, что `/api/v1/titles/facets/` учитывает параметры фильтрации'
+        )
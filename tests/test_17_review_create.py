@@ -0,0 +1,36 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test17ReviewCreate:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_single_insert(self, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(url, data={'text': 'Текст', 'score': 7})
+        assert response.status_code == 201
+        queries = [query['sql'] for query in context.captured_queries]
+        title_lookups = [
+            sql for sql in queries if sql.startswith('SELECT') and 'FROM "reviews_title"' in sql
+        ]
+        assert len(title_lookups) == 1, (
+            'Проверьте, что произведение запрашивается не более одного раза за запрос'
+        )
+        assert not [sql for sql in queries if sql.startswith('SELECT') and 'FROM "reviews_review"' in sql], (
+            'Проверьте, что создание отзыва не выполняет отдельную проверку существования отзыва'
+        )
+
+        response = admin_client.post(url, data={'text': 'Ещё текст', 'score': 3})
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв пользователя на произведение возвращает статус 400'
+        )
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['rating'] == 7, (
+            'Проверьте, что отклонённый отзыв не влияет на рейтинг произведения'
+        )
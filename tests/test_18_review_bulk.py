@@ -0,0 +1,49 @@
+import pytest
+
+from .common import create_titles, create_users_api
+
+
+class Test18ReviewBulk:
+    url = '/api/v1/titles/reviews/bulk/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_create(self, admin_client, user_client, admin):
+        titles, _, _ = create_titles(admin_client)
+        user, moderator = create_users_api(admin_client)
+        title_id = titles[0]['id']
+        records = [
+            {'title_id': title_id, 'author': user.username, 'text': 'Раз', 'score': 8,
+             'pub_date': '2019-09-24T21:08:21.567Z'},
+            {'title_id': title_id, 'author': moderator.username, 'text': 'Два', 'score': 4},
+            {'title_id': titles[1]['id'], 'author': user.username, 'text': 'Три', 'score': 10},
+            {'title_id': title_id, 'author': user.username, 'text': 'Дубль', 'score': 1},
+            {'title_id': 100500, 'author': user.username, 'text': 'Нет', 'score': 1},
+            {'title_id': title_id, 'author': 'nobody', 'text': 'Нет', 'score': 1},
+            {'title_id': title_id, 'author': admin.username, 'text': 'Нет', 'score': 11},
+        ]
+        assert user_client.post(self.url, data=records, format='json').status_code == 403, (
+            'Проверьте, что массовая загрузка отзывов доступна только администратору'
+        )
+
+        response = admin_client.post(self.url, data=records, format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что POST запрос `/api/v1/titles/reviews/bulk/` возвращает статус 201'
+        )
+        data = response.json()
+        assert data['created'] == 3
+        assert [error['index'] for error in data['errors']] == [3, 4, 5, 6], (
+            'Проверьте, что ошибки возвращаются для каждой некорректной записи'
+        )
+        assert 'score' in data['errors'][3]['errors']
+
+        reviews = admin_client.get(f'/api/v1/titles/{title_id}/reviews/').json()['results']
+        assert {review['text'] for review in reviews} == {'Раз', 'Два'}
+        assert {review['pub_date'] for review in reviews if review['text'] == 'Раз'} == {
+            '2019-09-24T21:08:21.567000Z'
+        }, 'Проверьте, что сохраняется переданная дата публикации'
+        assert admin_client.get(f'/api/v1/titles/{title_id}/').json()['rating'] == 6, (
+            'Проверьте, что массовая загрузка обновляет рейтинг произведения'
+        )
+
+        response = admin_client.post(self.url, data=records[:1], format='json')
+        assert response.status_code == 400
@@ -0,0 +1,38 @@
+import pytest
+from django.core.management import call_command
+
+from .common import create_comments
+
+
+class Test19CommentsCount:
+
+    @staticmethod
+    def counts(client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/reviews/')
+        return {review['id']: review['comments_count'] for review in response.json()['results']}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_comments_count(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        assert self.counts(client, title_id) == {
+            reviews[0]['id']: 3, reviews[1]['id']: 0, reviews[2]['id']: 0
+        }, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/` '
+            'возвращается количество комментариев `comments_count`'
+        )
+        admin_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/{comments[0]["id"]}/'
+        )
+        assert self.counts(client, title_id)[review_id] == 2, (
+            'Проверьте, что при удалении комментария уменьшается `comments_count`'
+        )
+        moderator.delete()
+        assert self.counts(client, title_id)[review_id] == 1, (
+            'Проверьте, что при каскадном удалении комментариев уменьшается `comments_count`'
+        )
+
+        from reviews.models import Review
+        Review.objects.update(comments_count=0)
+        call_command('rebuild_counters', verbosity=0)
+        assert self.counts(client, title_id)[review_id] == 1
@@ -0,0 +1,43 @@
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+class Test20ScoreHistogram:
+
+    @staticmethod
+    def histogram(client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/histogram/')
+        assert response.status_code == 200, (
+            'Проверьте, что GET запрос `/api/v1/titles/{title_id}/histogram/` возвращает статус 200'
+        )
+        return {score: count for score, count in response.json().items() if count}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_histogram(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        assert self.histogram(client, title_id) == {'5': 1, '3': 1, '4': 1}
+        assert self.histogram(client, titles[1]['id']) == {}
+        assert len(client.get(f'/api/v1/titles/{title_id}/histogram/').json()) == 10
+        assert client.get('/api/v1/titles/100500/histogram/').status_code == 404
+
+        auth_client(user).patch(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/', data={'score': 5}
+        )
+        assert self.histogram(client, title_id) == {'5': 2, '4': 1}, (
+            'Проверьте, что при изменении оценки обновляется распределение оценок'
+        )
+        moderator.delete()
+        assert self.histogram(client, title_id) == {'5': 2}, (
+            'Проверьте, что при удалении отзыва обновляется распределение оценок'
+        )
+
+        from reviews.models import ScoreHistogram
+        ScoreHistogram.objects.all().delete()
+        call_command('rebuild_counters', verbosity=0)
+        assert self.histogram(client, title_id) == {'5': 2}
+
+        admin_client.delete(f'/api/v1/titles/{title_id}/')
+        assert not ScoreHistogram.objects.exists()
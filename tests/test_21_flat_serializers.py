@@ -0,0 +1,64 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from .common import create_catalogue, create_comments
+
+
+def create_reviews_bulk(size):
+    from django.contrib.auth import get_user_model
+    from reviews.models import Review
+
+    title = create_catalogue(1)[0]
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@yamdb.fake') for i in range(size)
+    )
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text=f'Отзыв {author.pk}', score=author.pk % 10 + 1)
+        for author in User.objects.all()
+    )
+    return Review.objects.filter(title=title).order_by('id')
+
+
+class Test21FlatSerializers:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_identical_json(self, client, admin_client, admin):
+        from api.serializers import (CommentFlatSerializer, CommentSerializer,
+                                     ReviewFlatSerializer, ReviewSerializer)
+        from reviews.models import Comment, Review
+
+        create_comments(admin_client, admin)
+        renderer = JSONRenderer()
+        for flat_class, model_serializer, model in (
+            (ReviewFlatSerializer, ReviewSerializer, Review),
+            (CommentFlatSerializer, CommentSerializer, Comment),
+        ):
+            queryset = model.objects.order_by('id')
+            flat = flat_class()
+            assert renderer.render(flat.serialize(flat.project(queryset))) == renderer.render(
+                model_serializer(queryset, many=True).data
+            ), f'Проверьте, что {flat_class.__name__} возвращает тот же JSON, что и {model_serializer.__name__}'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_list_queries(self, client, django_assert_num_queries):
+        reviews = create_reviews_bulk(50)
+        title_id = reviews[0].title_id
+        # версия для ETag, произведение, COUNT, страница с авторами
+        with django_assert_num_queries(4):
+            response = client.get(f'/api/v1/titles/{title_id}/reviews/?limit=50')
+        assert len(response.json()['results']) == 50
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_large_page(self, django_assert_num_queries):
+        """Плоская сериализация большой страницы: тот же JSON за один запрос."""
+        from api.serializers import ReviewFlatSerializer, ReviewSerializer
+
+        queryset = create_reviews_bulk(1000)
+        renderer = JSONRenderer()
+        flat = ReviewFlatSerializer()
+        with django_assert_num_queries(1):
+            flat_content = renderer.render(flat.serialize(flat.project(queryset.all())))
+        assert flat_content == renderer.render(ReviewSerializer(queryset.all(), many=True).data), (
+            'Проверьте, что ReviewFlatSerializer возвращает тот же JSON, что и ReviewSerializer'
+        )
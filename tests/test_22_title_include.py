@@ -0,0 +1,58 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test22TitleInclude:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_include(self, client, admin_client, admin, django_assert_num_queries):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+
+        # версия для ETag, произведение, жанры, отзывы, комментарии
+        with django_assert_num_queries(5):
+            response = client.get(f'{url}?include=reviews,comments&comments_limit=2')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['name'] == titles[0]['name']
+        assert [review['id'] for review in data['reviews']] == sorted(
+            (review['id'] for review in reviews), reverse=True
+        ), 'Проверьте, что вложенные отзывы отсортированы от новых к старым'
+        embedded = {review['id']: review['comments'] for review in data['reviews']}
+        assert [comment['id'] for comment in embedded[reviews[0]['id']]] == [
+            comments[2]['id'], comments[1]['id']
+        ], 'Проверьте, что для отзыва возвращаются последние комментарии с учётом `comments_limit`'
+        assert embedded[reviews[1]['id']] == []
+
+        data = client.get(f'{url}?include=reviews&reviews_limit=1').json()
+        assert len(data['reviews']) == 1 and 'comments' not in data['reviews'][0]
+        assert 'reviews' not in client.get(url).json()
+        assert client.get(f'{url}?include=genres').status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_max_depth(self, client, admin_client, admin, settings):
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        settings.TITLE_INCLUDE = dict(settings.TITLE_INCLUDE, MAX_DEPTH=1)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(f'{url}?include=comments').status_code == 400, (
+            'Проверьте, что глубина вложенности ограничивается настройкой `MAX_DEPTH`'
+        )
+        assert client.get(f'{url}?include=reviews').status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_comment_edit_etag(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/?include=comments'
+        etag = client.get(url)['ETag']
+        response = admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/{comments[2]["id"]}/',
+            data={'text': 'Исправлено'}
+        )
+        assert response.status_code == 200
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            'Проверьте, что после правки комментария меняется ETag произведения с `include=comments`'
+        )
+        embedded = {review['id']: review['comments'] for review in response.json()['reviews']}
+        assert embedded[reviews[0]['id']][0]['text'] == 'Исправлено'
@@ -0,0 +1,46 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test23AuthorFeeds:
+
+    @staticmethod
+    def walk(client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+            )
+            data = response.json()
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        return ids
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_feeds(self, client, admin_client, admin):
+        comments, reviews, titles, user, _ = create_comments(admin_client, admin)
+        admin_client.post(f'/api/v1/titles/{titles[1]["id"]}/reviews/', data={'text': 'Ещё', 'score': 2})
+        admin_reviews = self.walk(client, f'/api/v1/users/{admin.username}/reviews/?limit=1')
+        assert len(admin_reviews) == 2 and admin_reviews[1] == reviews[0]['id'], (
+            'Проверьте, что `/api/v1/users/{username}/reviews/` возвращает отзывы автора от новых к старым'
+        )
+        assert self.walk(client, f'/api/v1/users/{user.username}/comments/') == [comments[1]['id']]
+        assert self.walk(client, f'/api/v1/users/{user.username}/reviews/') == [reviews[1]['id']]
+        assert client.get('/api/v1/users/nobody/reviews/').status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_feed_plan(self):
+        from django.db import connection
+        from reviews.models import Comment, Review
+
+        for model, index in ((Review, 'review_author_pub_date_idx'), (Comment, 'comment_author_pub_date_idx')):
+            queryset = model.objects.filter(author_id=1, pub_date__lt='2020-01-01T00:00:00Z').order_by('-pub_date', '-id')[:10]
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+            assert index in plan and 'TEMP B-TREE' not in plan, (
+                f'Проверьте, что лента автора читается по индексу `{index}` без сортировки: {plan}'
+            )
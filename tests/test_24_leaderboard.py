@@ -0,0 +1,78 @@
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+def weighted(*scores):
+    options = settings.LEADERBOARD
+    return (
+        (options['MIN_VOTES'] * options['PRIOR_MEAN'] + sum(scores))
+        / (options['MIN_VOTES'] + len(scores))
+    )
+
+
+class Test24Leaderboard:
+
+    @staticmethod
+    def top(client, url):
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+        )
+        return [(title['id'], title['weighted_rating']) for title in response.json()]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_top(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        data = {'name': 'Шедевр', 'year': 2021, 'genre': ['horror'], 'category': 'films'}
+        title_id = admin_client.post('/api/v1/titles/', data=data).json()['id']
+        auth_client(user).post(
+            f'/api/v1/titles/{title_id}/reviews/', data={'text': 'Шедевр', 'score': 10}
+        )
+
+        top = self.top(client, '/api/v1/categories/films/top/')
+        assert [pk for pk, _ in top] == [title_id, titles[0]['id']], (
+            'Проверьте, что `/api/v1/categories/{slug}/top/` упорядочен по взвешенному рейтингу'
+        )
+        assert top[1][1] == pytest.approx(weighted(5, 3, 4)), (
+            'Проверьте, что взвешенный рейтинг рассчитывается по байесовской формуле'
+        )
+        assert self.top(client, '/api/v1/categories/books/top/') == [], (
+            'Проверьте, что произведения без отзывов не попадают в рейтинг'
+        )
+        assert self.top(client, '/api/v1/genres/horror/top/') == top
+        assert [pk for pk, _ in self.top(client, '/api/v1/genres/comedy/top/')] == [titles[0]['id']]
+        assert self.top(client, '/api/v1/categories/films/top/?limit=1') == top[:1]
+        assert client.get('/api/v1/categories/films/top/?limit=a').status_code == 400
+        assert client.get('/api/v1/genres/unknown/top/').status_code == 404
+        assert client.post('/api/v1/genres/horror/top/').status_code in (401, 403, 405)
+
+        auth_client(user).patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/', data={'score': 10}
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'genre': ['horror', 'comedy', 'drama']}
+        )
+        expected = [(titles[0]['id'], pytest.approx(weighted(5, 10, 4)))]
+        assert self.top(client, '/api/v1/genres/drama/top/') == expected, (
+            'Проверьте, что рейтинг жанра обновляется при изменении оценки и жанров произведения'
+        )
+
+        moderator.delete()
+        expected = [(titles[0]['id'], pytest.approx(weighted(5, 10)))]
+        assert self.top(client, '/api/v1/genres/comedy/top/') == expected, (
+            'Проверьте, что при удалении отзыва обновляется взвешенный рейтинг'
+        )
+
+        from reviews.models import GenreTitle, Review, Title
+        Review.objects.filter(title_id=title_id).delete()
+        assert [pk for pk, _ in self.top(client, '/api/v1/genres/horror/top/')] == [titles[0]['id']]
+
+        Title.objects.update(weighted_rating=None)
+        GenreTitle.objects.update(weighted_rating=None)
+        call_command('rebuild_counters', verbosity=0)
+        assert self.top(client, '/api/v1/genres/comedy/top/') == expected, (
+            'Проверьте, что `rebuild_counters` пересчитывает взвешенный рейтинг'
+        )
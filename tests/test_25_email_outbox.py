@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+class NoTransactionBackend(locmem.EmailBackend):
+    """Почтовый бэкенд, проверяющий, что письма отправляются вне транзакции."""
+
+    def send_messages(self, messages):
+        assert not connection.in_atomic_block, (
+            'Проверьте, что письма отправляются без открытой транзакции'
+        )
+        return super().send_messages(messages)
+
+
+class Test25EmailOutbox:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_batches(self, client, settings):
+        settings.EMAIL_BACKEND = 'tests.test_25_email_outbox.NoTransactionBackend'
+        from users.models import OutgoingEmail
+        from users.outbox import send_outbox
+        for number in range(5):
+            response = client.post(
+                '/api/v1/auth/signup/',
+                data={'email': f'user{number}@yamdb.fake', 'username': f'user{number}'}
+            )
+            assert response.status_code == 200
+        assert OutgoingEmail.objects.filter(sent_at__isnull=True).count() == 5, (
+            'Проверьте, что `/api/v1/auth/signup/` ставит письмо в очередь'
+        )
+        assert len(mail.outbox) == 0
+
+        with CaptureQueriesContext(connection) as context:
+            assert send_outbox(batch_size=2) == (5, 0)
+        statements = [
+            query['sql'].split()[0] for query in context.captured_queries
+            if query['sql'].split()[0] in ('SELECT', 'UPDATE')
+        ]
+        assert statements == ['SELECT', 'UPDATE', 'UPDATE'] * 3 + ['SELECT'], (
+            'Проверьте, что захват пакета и результаты отправки сохраняются одним запросом'
+        )
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            f'user{number}@yamdb.fake' for number in range(5)
+        ]
+        assert not OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
+        assert not OutgoingEmail.objects.exclude(body='').exists(), (
+            'Проверьте, что текст с кодом подтверждения удаляется после отправки'
+        )
+        assert send_outbox() == (0, 0), 'Проверьте, что письма отправляются один раз'
+
+        from django.contrib import admin
+        assert 'body' not in admin.site._registry[OutgoingEmail].get_fields(None), (
+            'Проверьте, что текст письма не показывается в админке'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_retry(self, settings, tmp_path):
+        from users.models import OutgoingEmail
+        from users.outbox import enqueue_email
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+        settings.EMAIL_FILE_PATH = str(tmp_path / 'not_a_directory')
+        (tmp_path / 'not_a_directory').write_text('')
+        email = enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+
+        call_command('send_outbox', verbosity=0)
+        email.refresh_from_db()
+        assert email.sent_at is None and email.attempts == 1
+        assert email.last_error, 'Проверьте, что сохраняется текст ошибки отправки'
+        delay = email.next_attempt_at - timezone.now()
+        assert timedelta(seconds=0) < delay <= timedelta(seconds=settings.EMAIL_OUTBOX['RETRY_DELAY'])
+
+        settings.EMAIL_FILE_PATH = str(tmp_path / 'mail')
+        call_command('send_outbox', verbosity=0)
+        email.refresh_from_db()
+        assert email.sent_at is None, 'Проверьте, что письмо не отправляется раньше следующей попытки'
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        settings.EMAIL_FILE_PATH = str(tmp_path / 'not_a_directory')
+        call_command('send_outbox', verbosity=0)
+        email.refresh_from_db()
+        assert email.attempts == 2
+        assert email.next_attempt_at - timezone.now() > delay, (
+            'Проверьте, что интервал между попытками растёт'
+        )
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        settings.EMAIL_FILE_PATH = str(tmp_path / 'mail')
+        call_command('send_outbox', verbosity=0)
+        email.refresh_from_db()
+        assert email.sent_at is not None and email.attempts == 3
+        assert 'user@yamdb.fake' in next((tmp_path / 'mail').iterdir()).read_text()
+
+        settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, MAX_ATTEMPTS=1)
+        settings.EMAIL_FILE_PATH = str(tmp_path / 'not_a_directory')
+        email = enqueue_email('Тема', 'Код: 123', 'user@yamdb.fake')
+        call_command('send_outbox', verbosity=0)
+        email.refresh_from_db()
+        assert email.sent_at is None and email.body == '', (
+            'Проверьте, что текст письма удаляется, когда попытки отправки исчерпаны'
+        )
@@ -0,0 +1,55 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "users_user"' in query['sql']
+    ]
+
+
+class Test26AuthCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cached_user(self, admin_client, user):
+        client = auth_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(3):
+                assert client.get('/api/v1/users/me/').status_code == 200
+        assert not user_queries(context), (
+            'Проверьте, что аутентифицированный пользователь берётся из кэша'
+        )
+
+        assert client.get('/api/v1/users/').status_code == 403
+        response = admin_client.patch(f'/api/v1/users/{user.username}/', data={'role': 'admin'})
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что изменение роли сразу сбрасывает пользователя в кэше'
+        )
+
+        user.refresh_from_db()
+        user.is_active = False
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что деактивированный пользователь не аутентифицируется'
+        )
+        user.delete()
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_me_patch_reloads_user(self, user, django_user_model):
+        client = auth_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        # Изменение в другом процессе: кэш этого процесса о нём не знает
+        django_user_model.objects.filter(pk=user.pk).update(role='moderator', first_name='Иван')
+        response = client.patch('/api/v1/users/me/', data={'bio': 'Обо мне'})
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert (user.role, user.first_name, user.bio) == ('moderator', 'Иван', 'Обо мне'), (
+            'Проверьте, что `PATCH /api/v1/users/me/` не перезаписывает данные пользователем из кэша'
+        )
@@ -0,0 +1,87 @@
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .common import create_reviews
+
+
+def claims_client(user):
+    from api.tokens import RoleAccessToken
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}')
+    return client
+
+
+class Test27RoleClaims:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_token(self, client, django_user_model):
+        data = {'email': 'claims@yamdb.fake', 'username': 'claims'}
+        client.post('/api/v1/auth/signup/', data=data)
+        call_command('send_outbox', verbosity=0)
+        code = mail.outbox[-1].body.split(': ')[-1]
+        response = client.post(
+            '/api/v1/auth/token/', data={'username': 'claims', 'confirmation_code': code}
+        )
+        assert response.status_code == 200
+        token = AccessToken(response.json()['Ваш токен'])
+        user = django_user_model.objects.get(username='claims')
+        assert token['role'] == 'user' and token['ver'] == user.token_version, (
+            'Проверьте, что токен содержит роль и версию токенов пользователя'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_claims_permissions(self, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        client = claims_client(moderator)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        client.get('/api/v1/users/me/')
+        with CaptureQueriesContext(connection) as context:
+            response = client.delete(f'{url}{reviews[0]["id"]}/')
+        assert response.status_code == 204
+        assert not [
+            query for query in context.captured_queries if 'FROM "users_user"' in query['sql']
+        ], 'Проверьте, что права модератора проверяются по токену без запросов к users_user'
+
+        assert claims_client(admin).get('/api/v1/users/').status_code == 200
+        assert claims_client(user).get('/api/v1/users/').status_code == 403
+
+        response = admin_client.patch(f'/api/v1/users/{moderator.username}/', data={'role': 'user'})
+        assert response.status_code == 200
+        assert client.delete(f'{url}{reviews[1]["id"]}/').status_code == 403, (
+            'Проверьте, что после смены роли прежний токен не даёт прав модератора'
+        )
+        moderator.refresh_from_db()
+        assert moderator.token_version == 1
+        assert claims_client(moderator).delete(f'{url}{reviews[1]["id"]}/').status_code == 403
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_version_cache(self, admin, django_user_model, monkeypatch, settings):
+        import time
+
+        from api.tokens import get_token_version
+        from django.db import transaction
+
+        client = claims_client(admin)
+        assert client.get('/api/v1/users/').status_code == 200
+        with transaction.atomic():
+            admin.role = 'user'
+            admin.save()
+            assert get_token_version(admin.pk) == 0, (
+                'Проверьте, что новая версия токенов попадает в кэш только после фиксации'
+            )
+        assert get_token_version(admin.pk) == 1
+
+        # Изменение в другом процессе: кэш этого процесса о нём не знает
+        django_user_model.objects.filter(pk=admin.pk).update(token_version=5)
+        assert get_token_version(admin.pk) == 1
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now + settings.ROLE_CLAIMS['TIMEOUT'] + 1)
+        assert get_token_version(admin.pk) == 5, (
+            'Проверьте, что версия токенов хранится в кэше ограниченное время'
+        )
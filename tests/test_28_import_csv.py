@@ -0,0 +1,275 @@
+import csv
+import json
+import os
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_titles, create_users_api
+
+
+def write_csv(path, header, rows):
+    lines = [header] + [','.join(str(value) for value in row) for row in rows]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def csv_rows(path):
+    with open(path, newline='', encoding='utf-8') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+class Test28ImportCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk(self, admin_client, django_user_model, tmp_path):
+        from reviews.models import Comment, Review, Title
+        titles, _, _ = create_titles(admin_client)
+        user, moderator = create_users_api(admin_client)
+        title_id = titles[0]['id']
+        rows = [
+            (number, title_id, f'Отзыв {number}', user.pk if number % 2 else moderator.pk, 5,
+             '2019-09-24T21:08:21.567Z')
+            for number in range(1, 3)
+        ]
+        csv_file = write_csv(tmp_path / 'review.csv', 'id,title_id,text,author,score,pub_date', rows)
+
+        with CaptureQueriesContext(connection) as context:
+            call_command('import_csv', csv_file, 'Review', bulk=True, chunk_size=10, verbosity=0)
+        queries = len(context.captured_queries)
+        assert Review.objects.count() == 2
+
+        authors = [user.pk, moderator.pk] + [
+            django_user_model.objects.create(username=f'author{number}', email=f'author{number}@yamdb.fake').pk
+            for number in range(3, 21)
+        ]
+        rows = [(number, title_id, f'Новый {number}', authors[number - 1], 5, '2019-09-24T21:08:21.567Z')
+                for number in range(1, 21)]
+        rows[0] = (1, title_id, 'Изменён', user.pk, 9, '2019-09-24T21:08:21.567Z')
+        csv_file = write_csv(tmp_path / 'review.csv', 'id,title_id,text,author,score,pub_date', rows)
+        with CaptureQueriesContext(connection) as context:
+            call_command('import_csv', csv_file, 'Review', bulk=True, chunk_size=20, verbosity=0)
+        # Тот же один пакет, дополнительно только bulk_update изменённых строк
+        assert len(context.captured_queries) <= queries + 1, (
+            'Проверьте, что в режиме --bulk число запросов не зависит от числа строк'
+        )
+        assert Review.objects.get(pk=1).text == 'Изменён'
+        assert Review.objects.get(pk=1).pub_date.year == 2019
+
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (9 + 5 * 19, 20), (
+            'Проверьте, что после импорта в режиме --bulk рейтинг пересчитывается'
+        )
+
+        csv_file = write_csv(
+            tmp_path / 'comments.csv', 'id,review_id,text,author,pub_date',
+            [(1, 1, 'Раз', user.pk, '2020-01-13T23:20:02.422Z'),
+             (2, 1, 'Два', user.pk, 'вчера'),
+             (3, 2, 'Три', moderator.pk, '2020-01-13T23:20:02.422Z')]
+        )
+        out = StringIO()
+        call_command('import_csv', csv_file, 'Comment', bulk=True, stdout=out)
+        assert set(Comment.objects.values_list('id', flat=True)) == {1, 3}, (
+            'Проверьте, что ошибка в строке не отменяет импорт остальных строк пакета'
+        )
+        assert "Can't create or update model instance" in out.getvalue()
+        assert 'failed 1' in out.getvalue()
+        assert Comment.objects.get(pk=1).pub_date.year == 2020
+        assert Review.objects.get(pk=1).comments_count == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_diff(self, tmp_path):
+        from reviews.models import Review, Title
+        call_command('load_dataset', workers=1, verbosity=0)
+        source = os.path.join(settings.BASE_DIR, 'static', 'data', 'review.csv')
+        with open(source, newline='', encoding='utf-8') as csv_file:
+            reader = csv.reader(csv_file)
+            header = next(reader)
+            rows = list(reader)
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command('import_csv', source, 'Review', diff=True, chunk_size=100, stdout=out)
+        assert f'unchanged {len(rows)}' in out.getvalue() and 'updated 0' in out.getvalue()
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        assert not writes, 'Проверьте, что при --diff неизменённые строки не записываются'
+
+        score = header.index('score')
+        rows[0][score] = '1' if rows[0][score] != '1' else '2'
+        removed = rows.pop()
+        changed = tmp_path / 'review.csv'
+        with open(changed, 'w', newline='', encoding='utf-8') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+        out = StringIO()
+        call_command('import_csv', str(changed), 'Review', diff=True, prune=True, stdout=out)
+        assert f'updated 1, unchanged {len(rows) - 1}, deleted 1' in out.getvalue(), out.getvalue()
+        assert Review.objects.get(pk=rows[0][0]).score == int(rows[0][score])
+        assert not Review.objects.filter(pk=removed[0]).exists()
+        title = Title.objects.get(pk=rows[0][header.index('title_id')])
+        assert title.rating_count == title.reviews.count(), (
+            'Проверьте, что после --diff --prune рейтинг пересчитывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_resume(self, tmp_path, monkeypatch):
+        from reviews.management.commands.import_csv import Command
+        from reviews.models import Review
+        call_command('load_dataset', workers=1, verbosity=0)
+        Review.objects.all().delete()
+        source = os.path.join(settings.BASE_DIR, 'static', 'data', 'review.csv')
+        csv_file = tmp_path / 'review.csv'
+        csv_file.write_bytes(open(source, 'rb').read())
+        total = len(csv_rows(source))
+
+        import_chunk = Command.import_chunk
+        calls = []
+
+        def crashing_import_chunk(self, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError('crash')
+            return import_chunk(self, *args, **kwargs)
+
+        monkeypatch.setattr(Command, 'import_chunk', crashing_import_chunk)
+        with pytest.raises(RuntimeError):
+            call_command('import_csv', str(csv_file), 'Review', bulk=True, chunk_size=5, verbosity=0)
+        checkpoint = json.loads((tmp_path / 'review.csv.checkpoint').read_text())
+        assert checkpoint['row'] == 10 and Review.objects.count() == 10, (
+            'Проверьте, что контрольная точка сохраняется после каждого пакета'
+        )
+        monkeypatch.setattr(Command, 'import_chunk', import_chunk)
+
+        out = StringIO()
+        call_command(
+            'import_csv', str(csv_file), 'Review', bulk=True, resume=True, chunk_size=5,
+            progress_interval=1e-9, stdout=out
+        )
+        output = out.getvalue()
+        assert f'Created {total - 10}, updated 0' in output, (
+            'Проверьте, что --resume продолжает импорт с контрольной точки'
+        )
+        assert 'rows/s' in output and 'ETA' in output and 'errors 0' in output, (
+            'Проверьте, что выводится скорость импорта, оставшееся время и доля ошибок'
+        )
+        assert Review.objects.count() == total
+        assert not (tmp_path / 'review.csv.checkpoint').exists()
+
+        with pytest.raises(CommandError):
+            call_command('import_csv', str(csv_file), 'Review', bulk=True, resume=True)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_bulk_users(self, django_user_model, tmp_path):
+        from api.tokens import RoleAccessToken
+        from rest_framework.test import APIClient
+        boss = django_user_model.objects.create(username='boss', email='boss@yamdb.fake', role='admin')
+        other = django_user_model.objects.create(username='other', email='other@yamdb.fake')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(boss)}')
+        assert client.get('/api/v1/users/').status_code == 200
+
+        csv_file = write_csv(
+            tmp_path / 'users.csv', 'id,username,email,role',
+            [(boss.pk, 'boss', 'boss@yamdb.fake', 'user'), (other.pk, 'other', 'new@yamdb.fake', 'user')]
+        )
+        call_command('import_csv', csv_file, 'User', bulk=True, verbosity=0)
+        boss.refresh_from_db()
+        other.refresh_from_db()
+        assert (boss.role, boss.token_version) == ('user', 1), (
+            'Проверьте, что импорт в режиме --bulk увеличивает версию токенов при смене роли'
+        )
+        assert (other.email, other.token_version) == ('new@yamdb.fake', 0)
+        assert client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что после импорта прежний токен не даёт прав администратора'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_resume_refreshes_earlier_chunks(self, tmp_path, monkeypatch):
+        from django.db.models import Sum
+        from reviews.management.commands.import_csv import Command
+        from reviews.models import Review, Title
+        call_command('load_dataset', workers=1, verbosity=0)
+        source = os.path.join(settings.BASE_DIR, 'static', 'data', 'review.csv')
+        with open(source, newline='', encoding='utf-8') as csv_file:
+            reader = csv.reader(csv_file)
+            header = next(reader)
+            rows = list(reader)
+        score = header.index('score')
+        for row in rows[:5]:
+            row[score] = '1'
+        changed = tmp_path / 'review.csv'
+        with open(changed, 'w', newline='', encoding='utf-8') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+        import_chunk = Command.import_chunk
+        calls = []
+
+        def crashing_import_chunk(self, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('crash')
+            return import_chunk(self, *args, **kwargs)
+
+        monkeypatch.setattr(Command, 'import_chunk', crashing_import_chunk)
+        with pytest.raises(RuntimeError):
+            call_command('import_csv', str(changed), 'Review', diff=True, chunk_size=5, verbosity=0)
+        monkeypatch.setattr(Command, 'import_chunk', import_chunk)
+        out = StringIO()
+        call_command('import_csv', str(changed), 'Review', diff=True, resume=True, chunk_size=5, stdout=out)
+        assert 'updated 0' in out.getvalue()
+
+        for title in Title.objects.filter(reviews__in=[row[0] for row in rows[:5]]).distinct():
+            assert title.rating_sum == Review.objects.filter(title=title).aggregate(
+                total=Sum('score')
+            )['total'], 'Проверьте, что после --resume пересчитываются строки, записанные до сбоя'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_diff_refreshes_affected_titles(self, tmp_path):
+        from django.db.models import Count, Sum
+        from reviews.models import Review, ScoreHistogram, Title
+        call_command('load_dataset', workers=1, verbosity=0)
+        source = os.path.join(settings.BASE_DIR, 'static', 'data', 'review.csv')
+        rows = csv_rows(source)
+        versions = dict(Title.objects.values_list('pk', 'version'))
+        changed, moved = rows[0], rows[-1]
+        old_title = moved['title_id']
+        new_title = next(
+            str(pk) for pk in versions
+            if str(pk) != old_title
+            and not Review.objects.filter(title_id=pk, author_id=moved['author']).exists()
+        )
+        changed['score'] = '1' if changed['score'] != '1' else '2'
+        moved['title_id'] = new_title
+        changed_file = tmp_path / 'review.csv'
+        with open(changed_file, 'w', newline='', encoding='utf-8') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+        call_command('import_csv', str(changed_file), 'Review', diff=True, verbosity=0)
+        affected = {int(changed['title_id']), int(old_title), int(new_title)}
+        for title in Title.objects.all():
+            if title.pk not in affected:
+                assert title.version == versions[title.pk], (
+                    'Проверьте, что после `--diff` обновляются только затронутые произведения'
+                )
+                continue
+            assert title.version > versions[title.pk]
+            reviews = Review.objects.filter(title=title)
+            totals = reviews.aggregate(total=Sum('score'), count=Count('pk'))
+            assert (title.rating_sum, title.rating_count) == (totals['total'] or 0, totals['count'])
+            histogram = ScoreHistogram.objects.filter(title=title).first()
+            assert sum(
+                getattr(histogram, ScoreHistogram.field_name(score), 0) for score in range(1, 11)
+            ) == totals['count']
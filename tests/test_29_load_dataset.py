@@ -0,0 +1,67 @@
+import csv
+import os
+import shutil
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+def csv_rows(file_name, data_dir=DATA_DIR):
+    with open(os.path.join(data_dir, file_name), newline='', encoding='utf-8') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+class Test29LoadDataset:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_load(self):
+        from reviews.dataset import DATASET_FILES
+        from django.apps import apps
+        call_command('load_dataset', DATA_DIR, workers=2, verbosity=0)
+        for file_name, model_label in DATASET_FILES.items():
+            assert apps.get_model(model_label).objects.count() == len(csv_rows(file_name)), (
+                f'Проверьте, что `load_dataset` загружает все строки файла {file_name}'
+            )
+        from reviews.models import Review, Title
+        review = csv_rows('review.csv')[0]
+        assert Review.objects.get(pk=review['id']).author_id == int(review['author'])
+        title = Title.objects.get(pk=review['title_id'])
+        assert title.rating_count == Review.objects.filter(title=title).count()
+
+    def test_02_load_order(self):
+        from reviews.dataset import load_order
+        from reviews.models import Comment, Genre, GenreTitle, Review, Title
+        from users.models import User
+        order = load_order([Comment, Review, GenreTitle, Title, Genre, User])
+        for model, referenced in ((Comment, Review), (Review, User), (Review, Title),
+                                  (GenreTitle, Genre), (GenreTitle, Title)):
+            assert order.index(referenced) < order.index(model)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_errors(self, tmp_path):
+        from reviews.models import Review
+        for file_name in ('users.csv', 'category.csv', 'genre.csv', 'titles.csv'):
+            shutil.copy(os.path.join(DATA_DIR, file_name), tmp_path)
+        reviews = csv_rows('review.csv')[:4]
+        reviews[1]['score'] = '11'
+        reviews[2]['author'] = '100500'
+        with open(tmp_path / 'review.csv', 'w', newline='', encoding='utf-8') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(reviews[0]))
+            writer.writeheader()
+            writer.writerows(reviews)
+
+        out = StringIO()
+        call_command('load_dataset', str(tmp_path), workers=1, stdout=out)
+        assert set(Review.objects.values_list('id', flat=True)) == {
+            int(reviews[0]['id']), int(reviews[3]['id'])
+        }, 'Проверьте, что строки с ошибками пропускаются, а остальные загружаются'
+        output = out.getvalue()
+        assert 'review.csv:' in output and 'score' in output, (
+            'Проверьте, что для ошибок разбора выводится файл и строка'
+        )
+        assert '100500' in output
+        assert 'failed 2 Review rows' in output
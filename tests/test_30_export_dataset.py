@@ -0,0 +1,53 @@
+import csv
+import gzip
+import os
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+
+from .test_29_load_dataset import DATA_DIR
+
+
+def snapshot():
+    from reviews.dataset import DATASET_COLUMNS, DATASET_FILES, column_fields
+    result = {}
+    for file_name, label in DATASET_FILES.items():
+        model = apps.get_model(label)
+        fields = column_fields(model, DATASET_COLUMNS[file_name])
+        result[label] = list(model.objects.order_by('pk').values_list(*fields))
+    return result
+
+
+class Test30ExportDataset:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_round_trip(self, tmp_path):
+        from reviews.dataset import DATASET_FILES
+        call_command('load_dataset', DATA_DIR, workers=1, verbosity=0)
+        before = snapshot()
+
+        call_command('export_dataset', str(tmp_path / 'plain'), verbosity=0)
+        call_command('export_dataset', str(tmp_path / 'gzip'), gzip=True, chunk_size=7, verbosity=0)
+        for file_name in DATASET_FILES:
+            with open(os.path.join(DATA_DIR, file_name), newline='', encoding='utf-8') as source:
+                header = next(csv.reader(source))
+            with open(tmp_path / 'plain' / file_name, newline='', encoding='utf-8') as exported:
+                exported_header = next(csv.reader(exported))
+            assert exported_header[:len(header)] == header, (
+                f'Проверьте, что `export_dataset` сохраняет {file_name} в формате static/data'
+            )
+            with gzip.open(tmp_path / 'gzip' / f'{file_name}.gz', 'rt', encoding='utf-8') as compressed:
+                assert compressed.read() == (tmp_path / 'plain' / file_name).read_text(encoding='utf-8')
+
+        for label in reversed(list(DATASET_FILES.values())):
+            apps.get_model(label).objects.all().delete()
+        call_command('load_dataset', str(tmp_path / 'gzip'), workers=1, verbosity=0)
+        assert snapshot() == before, (
+            'Проверьте, что выгрузка `export_dataset` загружается обратно без потерь'
+        )
+
+        from reviews.models import Review
+        review = Review.objects.first()
+        call_command('import_csv', str(tmp_path / 'gzip' / 'review.csv.gz'), 'Review', verbosity=0)
+        assert Review.objects.get(pk=review.pk).pub_date == review.pub_date